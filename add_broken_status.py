@@ -1,9 +1,9 @@
 import os
-from notion_client import Client
+from http_transport import build_notion_client
 from dotenv import load_dotenv
 
 load_dotenv()
-notion = Client(auth=os.getenv("NOTION_TOKEN"))
+notion = build_notion_client(os.getenv("NOTION_TOKEN"))
 db_id = os.getenv("NOTION_DATABASE_ID")
 
 payload = {
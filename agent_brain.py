@@ -1,23 +1,36 @@
 import os
 import time
+import argparse
+import datetime
 import hashlib
 import traceback
 import re
-import requests
+import threading
 import logging
-from typing import Optional, Dict
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, List, Any, Set, Tuple
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 from notion_client import Client
-from duckduckgo_search import DDGS
 
 from agent_notion import (
     NOTION_TOKEN,
     NOTION_DATABASE_ID,
     validate_env,
     extract_plain_rich_text,
+    iter_database_batches,
+    parse_page,
     NotionAgent,
 )
 from backup_data import backup_notion_data
+from http_transport import UPSTREAM_TIMEOUT, build_notion_client, notion_session, notion_url, telegram_session, upstream_session
+from state_store import WATERMARK_OVERLAP, iso, parse_iso, state_path, load_json, save_json_atomic, utc_now
+from circuit_breaker import CIRCUIT_MAX_DEFERRALS, CircuitBreaker
+from search_cache import SearchCache
+from failure_cache import CLIENT_ERROR, EMPTY, NOT_FOUND, SERVER_ERROR, TIMEOUT, FailureCache
+from upstream_cache import ValidatorCache
+from url_resolver import canonical_url, redirect_chain, repair_candidates
 
 load_dotenv()
 
@@ -25,6 +38,23 @@ load_dotenv()
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
+# Upstream Fetch Concurrency
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "16"))  # global worker count
+FETCH_PER_HOST = int(os.getenv("FETCH_PER_HOST", "4"))  # max in-flight requests per host
+
+# Incremental Sync
+SYNC_STATE_PATH = state_path("sync_state.json")
+UPSTREAM_RECHECK_HOURS = float(os.getenv("UPSTREAM_RECHECK_HOURS", "20"))  # re-fetch unchanged pages' Source this often
+FULL_RESCAN_DAYS = float(os.getenv("FULL_RESCAN_DAYS", "7"))  # force a full Notion scan this often
+
+# Dead-link Healing
+HEAL_WORKERS = int(os.getenv("HEAL_WORKERS", "4"))  # broken pages healed concurrently
+HEAL_CANDIDATES = int(os.getenv("HEAL_CANDIDATES", "5"))  # search hits verified per broken page
+HEAL_MIN_SIMILARITY = float(os.getenv("HEAL_MIN_SIMILARITY", "0.1"))  # min shingle Jaccard vs last Content
+SHINGLE_SIZE = 5  # words per shingle
+HEAL_REPORT_LIMIT = 20  # healed / newly Broken links listed in one Telegram message
+SYNC_PREFIX = "自动同步自 Source："
+
 # Configure Logging
 class TelegramHandler(logging.Handler):
     """Custom Logging Handler that sends critical logs to Telegram."""
@@ -64,7 +94,7 @@ def send_telegram_message(message: str) -> None:
         "parse_mode": "HTML"
     }
     try:
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = telegram_session().post(url, json=payload)
         if resp.status_code != 200:
             logger.error(f"Telegram send failed: {resp.text}")
     except Exception as e:
@@ -73,222 +103,652 @@ def send_telegram_message(message: str) -> None:
 def md5_of_text(text: str) -> str:
     return hashlib.md5(text.encode("utf-8")).hexdigest()
 
-def search_for_alternative_url(title: str, original_url: str) -> Optional[str]:
+def search_alternative_urls(title: str, original_url: str, search: SearchCache,
+                            limit: int = HEAL_CANDIDATES) -> List[str]:
     """
-    Search for a new URL if the original one is broken.
-    Uses title + 'Github' or 'Cursor Rules' as query.
+    Search for replacement URLs if the original one is broken.
+    Uses title + 'Github' or 'Cursor Rules' as query. Only same-domain hits
+    (likely rename/move) and GitHub hits are trusted, same-domain first.
+    Results come from the search cache while fresh.
     """
     query = f"{title} Github Cursor Rules"
     logger.info(f"🔎 尝试自动修复链接，搜索关键词: {query}")
-    
+
+    original_domain = original_url.split('/')[2] if '//' in original_url else ""
+    same_domain: List[str] = []
+    github: List[str] = []
     try:
-        results = DDGS().text(query, max_results=3)
-        if not results:
-            return None
-            
-        original_domain = original_url.split('/')[2] if '//' in original_url else ""
-        
-        for res in results:
+        for res in search.text(query, max_results=max(limit * 2, 3)):
             href = res.get('href')
-            if not href:
+            if not href or href == original_url or href in same_domain or href in github:
                 continue
-                
-            # Smart Matching Logic
-            # 1. Same domain match (likely rename/move)
             if original_domain and original_domain in href:
-                logger.info(f"✨ 发现同域名新链接: {href}")
-                return href
-                
-            # 2. Trusted Source Match (GitHub/Official)
-            if "github.com" in href:
-                logger.info(f"✨ 发现可信源(GitHub): {href}")
-                return href
-                
+                same_domain.append(href)
+            elif "github.com" in href:
+                github.append(href)
     except Exception as e:
-        logger.error(f"Search failed: {e}")
-        
-    return None
-
-def fetch_remote_text(url: str, timeout: int = 15) -> Optional[str]:
+        logger.warning(f"Search failed: {e}")
+
+    return (same_domain + github)[:limit]
+
+def sync_body(text: str) -> str:
+    """Strip the "自动同步自 Source" header that synced Content starts with."""
+    if text.startswith(SYNC_PREFIX):
+        _, _, rest = text.partition("\n\n")
+        return rest
+    return text
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hashed word shingles of `text` (short texts yield a single shingle)."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return {hash(" ".join(words))} if words else set()
+    return {hash(" ".join(words[i:i + size])) for i in range(len(words) - size + 1)}
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+class FetchResult:
+    """
+    Outcome of fetching a Source URL. `redirects` is the redirect chain
+    followed (empty if none); `canonical_url` is set when the content was
+    found at a permanent new location the Source should be rewritten to.
+    `failure` classifies a failed fetch (see failure_cache); `deferred` means
+    the host's circuit is open and the URL was not (fully) tried.
+    """
+    __slots__ = ("url", "text", "not_modified", "etag", "last_modified", "redirects", "canonical_url", "failure",
+                 "deferred")
+
+    def __init__(self, url: str, text: Optional[str] = None, not_modified: bool = False,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 redirects: Optional[List[str]] = None, canonical_url: Optional[str] = None,
+                 failure: Optional[str] = None, deferred: bool = False):
+        self.url = url
+        self.failure = failure
+        self.deferred = deferred
+        self.text = text
+        self.not_modified = not_modified
+        self.etag = etag
+        self.last_modified = last_modified
+        self.redirects = redirects or []
+        self.canonical_url = canonical_url
+
+def fetch_source(url: str, timeout: int = UPSTREAM_TIMEOUT, cache: Optional[ValidatorCache] = None,
+                 breaker: Optional[CircuitBreaker] = None) -> FetchResult:
+    """
+    Fetch a Source URL with retries. When a validator cache is given the request
+    is conditional, and a 304 comes back as FetchResult(not_modified=True).
+    With a circuit breaker, timeouts and 5xx count against the host and an
+    open circuit returns FetchResult(deferred=True) without sending anything.
+    """
+    headers = cache.request_headers(url) if cache else {}
     max_retries = 3
+    failure = TIMEOUT
     for attempt in range(max_retries):
+        if breaker and not breaker.allow(url):
+            logger.info(f"⏸️  主机熔断中，暂不请求: {url}")
+            return FetchResult(url, failure=failure, deferred=True)
         try:
             logger.info(f"获取远程内容: {url} (Attempt {attempt+1}/{max_retries})")
-            resp = requests.get(url, timeout=timeout)
+            resp = upstream_session().get(url, timeout=timeout, headers=headers)
+            if breaker:
+                if resp.status_code >= 500:
+                    breaker.record_failure(url)
+                else:
+                    breaker.record_success(url)
+            redirects = redirect_chain(resp)
+            if redirects:
+                logger.info(f"↪️  重定向链: {' -> '.join(redirects)}")
+            if resp.status_code == 304 and headers:
+                logger.info(f"⏭️  [304 Not Modified]: {url}")
+                return FetchResult(url, not_modified=True)
             if resp.status_code == 200:
                 text = resp.text
                 if not text:
-                    logger.error(f"远程内容为空: {url}")
-                    return None
-                return text
-            elif resp.status_code == 404:
-                logger.warning(f"404 Not Found: {url}")
-                return None
+                    logger.warning(f"远程内容为空: {url}")
+                    return FetchResult(url, failure=EMPTY)
+                return FetchResult(
+                    url,
+                    text=text,
+                    etag=resp.headers.get("ETag"),
+                    last_modified=resp.headers.get("Last-Modified"),
+                    redirects=redirects,
+                    canonical_url=canonical_url(resp),
+                )
+            elif resp.status_code in (404, 410):
+                logger.warning(f"{resp.status_code} Not Found: {url}")
+                return FetchResult(url, redirects=redirects, failure=NOT_FOUND)
+            elif 400 <= resp.status_code < 500 and resp.status_code != 429:
+                # Retrying will not change the answer
+                logger.warning(f"请求失败 {resp.status_code}: {url}")
+                return FetchResult(url, redirects=redirects, failure=CLIENT_ERROR)
             else:
-                logger.error(f"请求失败 {resp.status_code}: {url}")
+                logger.warning(f"请求失败 {resp.status_code}: {url}")
+                failure = SERVER_ERROR
         except Exception as e:
-            logger.error(f"请求异常 {url}: {e}")
-        
+            # Per-attempt upstream failures stay out of Telegram (ERROR); outcomes are batched
+            logger.warning(f"请求异常 {url}: {e}")
+            failure = TIMEOUT
+            if breaker:
+                breaker.record_failure(url)
+
         if attempt < max_retries - 1:
             time.sleep(2)
-            
-    return None
 
-def sync_existing_sources(notion_client: Client, agent: NotionAgent) -> Dict[str, int]:
-    logger.info("开始存量更新：基于 Source 链接巡检")
-    start_cursor: Optional[str] = None
-    stats = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
-
-    while True:
-        # Use direct requests to avoid library version issues
-        url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
-        headers = {
-            "Authorization": f"Bearer {NOTION_TOKEN}",
-            "Notion-Version": "2022-06-28",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {"page_size": 100}
-        if start_cursor:
-            payload["start_cursor"] = start_cursor
-
-        try:
-            r = requests.post(url, json=payload, headers=headers, timeout=30)
-            if r.status_code != 200:
-                logger.error(f"Notion API Error: {r.text}")
-                break
-            resp = r.json()
-        except Exception as e:
-            logger.error(f"Notion Request Failed: {e}")
-            break
-
-        results = resp.get("results", [])
-        if not results:
-            break
+    # The failures that tripped the host's circuit are an outage, not a dead link
+    return FetchResult(url, failure=failure, deferred=bool(breaker and breaker.blocked(url)))
+
+def fetch_remote_text(url: str, timeout: int = UPSTREAM_TIMEOUT) -> Optional[str]:
+    return fetch_source(url, timeout=timeout).text
+
+class HostLimiter:
+    """Caps the number of concurrent requests per upstream host."""
+    def __init__(self, per_host: int = FETCH_PER_HOST):
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def for_url(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = sem
+            return sem
+
+def fetch_source_limited(url: str, limiter: HostLimiter, cache: Optional[ValidatorCache] = None,
+                         breaker: Optional[CircuitBreaker] = None) -> FetchResult:
+    """fetch_source guarded by the per-host limiter (and circuit breaker)."""
+    if breaker and breaker.blocked(url):
+        # Fail fast instead of queueing behind the host's semaphore
+        return FetchResult(url, deferred=True)
+    with limiter.for_url(url):
+        return fetch_source(url, cache=cache, breaker=breaker)
+
+def resolve_source(url: str, limiter: HostLimiter, cache: Optional[ValidatorCache] = None,
+                   breaker: Optional[CircuitBreaker] = None) -> FetchResult:
+    """
+    Fetch a Source; if it fails, try cheap deterministic repairs (redirect
+    target, GitHub blob -> raw, main <-> master) before the page is handed
+    to search-based healing. A repaired result carries the new canonical URL.
+    """
+    result = fetch_source_limited(url, limiter, cache, breaker)
+    if result.text is not None or result.not_modified or result.deferred:
+        return result
+    for candidate in repair_candidates(url, result.redirects):
+        repaired = fetch_source_limited(candidate, limiter, breaker=breaker)
+        if repaired.text is not None:
+            logger.info(f"🔧 确定性修复: {url} -> {candidate}")
+            repaired.canonical_url = repaired.canonical_url or candidate
+            return repaired
+    return result
+
+class HealingStage:
+    """
+    Heals dead Sources off the main sync path. Each broken page is queued;
+    a worker searches for candidates, fetches the top HEAL_CANDIDATES in
+    parallel on the shared fetch pool, and keeps the one most similar
+    (shingle Jaccard) to the page's last known Content. Successful repairs
+    are reported in one Telegram message when the stage is closed.
+    """
+    def __init__(self, agent: NotionAgent, fetch_pool: ThreadPoolExecutor, limiter: HostLimiter,
+                 stats: Dict[str, int], search: SearchCache, breaker: Optional[CircuitBreaker] = None,
+                 workers: int = HEAL_WORKERS):
+        self.agent = agent
+        self.search = search
+        self.breaker = breaker
+        self.fetch_pool = fetch_pool
+        self.limiter = limiter
+        self.stats = stats  # merged into on close; counted separately meanwhile
+        self._counts: Dict[str, int] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="heal")
+        self._futures = []
+        self._lock = threading.Lock()
+        self.healed: List[Tuple[str, str, str]] = []  # (title, old url, new url)
+        self.broken: List[Tuple[str, str]] = []  # (title, url) newly marked Broken
+        self.failed = 0
+
+    def submit(self, item: Dict[str, Any]) -> None:
+        self._futures.append(self._pool.submit(self._heal, item))
+
+    def _count(self, result: str) -> None:
+        with self._lock:
+            self._counts[result] = self._counts.get(result, 0) + 1
+
+    def _best_candidate(self, item: Dict[str, Any], local_text: Optional[str]) -> Optional[Tuple[str, str, float]]:
+        """(url, text, similarity) of the best verified candidate, if any qualifies."""
+        candidates = search_alternative_urls(item["title"], item["source_url"], self.search)
+        if not candidates:
+            return None
+        futures = [
+            self.fetch_pool.submit(fetch_source_limited, url, self.limiter, None, self.breaker) for url in candidates
+        ]
+        reference = shingles(sync_body(local_text)) if local_text else set()
 
-        for page in results:
-            props = page.get("properties", {})
-            
-            # Extract Title
-            name_prop = props.get("Name") or {}
-            title_items = name_prop.get("title", [])
-            if not title_items:
+        best: Optional[Tuple[str, str, float]] = None
+        for url, future in zip(candidates, futures):
+            try:
+                fetched = future.result()
+            except Exception as e:
+                logger.warning(f"候选链接抓取异常 {url}: {e}")
                 continue
-            title = title_items[0].get("plain_text") or title_items[0].get("text", {}).get("content", "")
-            if not title:
+            text, url = fetched.text, fetched.canonical_url or url
+            if not text:
                 continue
+            if not reference:
+                # Nothing to compare against: keep search order (same domain, then GitHub)
+                return url, text, 0.0
+            score = jaccard(reference, shingles(text))
+            logger.info(f"候选链接相似度 {score:.2f}: {url}")
+            if score >= HEAL_MIN_SIMILARITY and (best is None or score > best[2]):
+                best = (url, text, score)
+        return best
+
+    def _heal(self, item: Dict[str, Any]) -> None:
+        title = item["title"]
+        source_url = item["source_url"]
+        try:
+            local_text = item_local_text(item)
+            best = self._best_candidate(item, local_text)
+
+            if best:
+                new_url, remote_text, score = best
+                logger.info(f"🚑 自愈成功: {source_url} -> {new_url} (相似度 {score:.2f})")
+                res = self.agent.save_to_notion(
+                    title=title, content=f"{SYNC_PREFIX}{new_url}\n\n{remote_text}",
+                    tag=item["tag"], url=new_url, status="Active",
+                )
+                self._count(res)
+                if res != "error":
+                    with self._lock:
+                        self.healed.append((title, source_url, new_url))
+                return
+
+            with self._lock:
+                self.failed += 1
+            if item["status"] == "Broken":
+                logger.info(f"❌ 死链保持 Broken: {title}")
+                self._count("skipped")
+                return
+            # Reported in the batched notification on close, not one message per page
+            logger.warning(f"❌ 死链自愈失败: {source_url} -> 标记为 Broken")
+            if local_text is None:
+                self._count("error")
+                return
+            res = self.agent.save_to_notion(
+                title=title, content=local_text, tag=item["tag"], url=source_url, status="Broken"
+            )
+            self._count(res)
+            if res != "error":
+                with self._lock:
+                    self.broken.append((title, source_url))
+        except Exception as e:
+            logger.error(f"自愈任务异常 {title}: {e}")
+            self._count("error")
+
+    def close(self) -> None:
+        """Wait for queued repairs, then send one batched notification."""
+        for future in self._futures:
+            future.result()
+        self._pool.shutdown()
+        for result, n in self._counts.items():
+            self.stats[result] = self.stats.get(result, 0) + n
+        if not self.healed and not self.broken:
+            return
+        lines = []
+        if self.healed:
+            lines.append(f"🔗 <b>已自动修复死链 {len(self.healed)} 条</b>")
+            for title, old_url, new_url in self.healed[:HEAL_REPORT_LIMIT]:
+                lines.append(f"📝 <b>{title}</b>\n❌ 原: {old_url}\n✅ 新: {new_url}")
+            if len(self.healed) > HEAL_REPORT_LIMIT:
+                lines.append(f"……及其他 {len(self.healed) - HEAL_REPORT_LIMIT} 条")
+        if self.broken:
+            lines.append(f"⛔ <b>新标记为 Broken {len(self.broken)} 条</b>")
+            for title, url in self.broken[:HEAL_REPORT_LIMIT]:
+                lines.append(f"📝 <b>{title}</b>\n❌ {url}")
+            if len(self.broken) > HEAL_REPORT_LIMIT:
+                lines.append(f"……及其他 {len(self.broken) - HEAL_REPORT_LIMIT} 条")
+        if self.failed:
+            lines.append(f"未能修复: {self.failed} 条")
+        send_telegram_message("\n\n".join(lines))
+
+def parse_sync_page(page: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Extract the fields the source sync needs from a raw Notion page."""
+    # Content is only joined later if a write needs it (see item_local_text)
+    record = parse_page(page, content=False)
+    if not record.title:
+        return None
+
+    return {
+        "page_id": record.page_id,
+        "title": record.title,
+        "source_url": record.source,
+        "tag": record.type if record.type in ["Skill", "MCP"] else "Skill",
+        "status": record.status or "Active",
+        "content_prop": page.get("properties", {}).get("Content") or {},
+        "local_hash": record.content_hash,
+        "hash_stored": record.hash_stored,
+    }
 
-            # Extract Source URL
-            source_prop = props.get("Source")
-            source_url = None
-            if source_prop and source_prop.get("type") == "url":
-                source_url = source_prop.get("url")
-
-            # Extract Tag
-            type_prop = props.get("Type")
-            tag_name: Optional[str] = None
-            if type_prop and type_prop.get("type") == "select":
-                sel = type_prop.get("select")
-                if sel:
-                    tag_name = sel.get("name")
-            if tag_name not in ["Skill", "MCP"]:
-                tag_name = "Skill"
-
-            # Extract Current Status
-            status_prop = props.get("Status")
-            current_status = "Active"
-            if status_prop:
-                current_status = status_prop.get("status", {}).get("name") or "Active"
-
-            # Extract Local Content
-            content_prop = props.get("Content") or {}
-            local_text = extract_plain_rich_text(content_prop)
-
-            # 1. Self-managed / AI Created (No Source)
-            if not source_url:
-                if current_status != "Active":
-                    logger.info(f"自建内容状态修复: {title} -> Active")
-                    res = agent.save_to_notion(
-                        title=title, content=local_text, tag=tag_name, url=None, status="Active"
-                    )
-                    stats[res] = stats.get(res, 0) + 1
-                else:
-                    # No source, already active, skip
-                    pass
-                continue
+def fetch_page_content(page_id: str) -> Optional[str]:
+    """Retrieve a single page's Content (used when only its hash is cached locally)."""
+    try:
+        resp = notion_session().get(notion_url(f"pages/{page_id}"))
+        if resp.status_code != 200:
+            logger.error(f"Notion API Error: {resp.text}")
+            return None
+        return parse_page(resp.json()).content
+    except Exception as e:
+        logger.error(f"Notion Request Failed: {e}")
+        return None
+
+def item_local_text(item: Dict[str, Any]) -> Optional[str]:
+    """The page's current Content, only materialized when a write needs it."""
+    if item.get("content_prop") is not None:
+        return extract_plain_rich_text(item["content_prop"])
+    # Incrementally rechecked pages only carry a hash; load the text on demand
+    return fetch_page_content(item["page_id"])
+
+def apply_source_result(
+    agent: NotionAgent,
+    item: Dict[str, Any],
+    result: FetchResult,
+    stats: Dict[str, int],
+    healer: HealingStage,
+    cache: Optional[ValidatorCache] = None,
+    failures: Optional[FailureCache] = None,
+) -> None:
+    """Decide what to do with a page once its Source has been fetched."""
+    title = item["title"]
+    source_url = item["source_url"]
+    tag_name = item["tag"]
+    current_status = item["status"]
+    remote_text = result.text
+
+    # Host circuit open: neither Broken nor healed; rechecked after the backoff
+    if result.deferred:
+        logger.info(f"⏸️  上游主机熔断，延后处理: {title}")
+        stats["deferred"] = stats.get("deferred", 0) + 1
+        if failures:
+            failures.record(source_url, result.failure or TIMEOUT, deferred=True)
+        return
 
-            # 2. Remote Fetch with Retry
-            remote_text = fetch_remote_text(source_url)
-
-            # 3. Dead Link / Fetch Failure
-            if remote_text is None:
-                # Try Self-Healing
-                logger.warning(f"⚠️  链接失效，尝试自愈: {title}")
-                new_url = search_for_alternative_url(title, source_url)
-                
-                if new_url:
-                    # Healing Success
-                    logger.info(f"🚑 自愈成功: {source_url} -> {new_url}")
-                    remote_text_healed = fetch_remote_text(new_url)
-                    
-                    if remote_text_healed:
-                        content_healed = f"自动同步自 Source：{new_url}\n\n{remote_text_healed}"
-                        res = agent.save_to_notion(
-                            title=title, content=content_healed, tag=tag_name, url=new_url, status="Active"
-                        )
-                        stats[res] = stats.get(res, 0) + 1
-                        
-                        send_telegram_message(
-                            f"🔗 <b>已自动修复死链</b>\n"
-                            f"📝 <b>{title}</b>\n"
-                            f"❌ 原: {source_url}\n"
-                            f"✅ 新: {new_url}"
-                        )
-                        continue
-                
-                # Healing Failed
-                if current_status != "Broken":
-                    logger.error(f"❌ 死链自愈失败: {source_url} -> 标记为 Broken")
-                    # Update status to Broken
-                    res = agent.save_to_notion(
-                        title=title, content=local_text, tag=tag_name, url=source_url, status="Broken"
-                    )
-                    stats[res] = stats.get(res, 0) + 1
-                else:
-                    logger.info(f"❌ 死链保持 Broken: {title}")
-                    stats["skipped"] += 1
-                continue
+    # Content now lives at a permanent new location: rewrite Source to it
+    canonical = result.canonical_url if result.canonical_url != source_url else None
+    if canonical and remote_text is not None:
+        logger.info(f"🔀 Source 更新为规范地址: {source_url} -> {canonical}")
+        if cache:
+            cache.forget(source_url)
+        source_url = canonical
+
+    # Upstream unchanged since it was last written to Notion
+    if result.not_modified:
+        logger.info(f"⏭️  [Not Modified] 跳过更新: {title}")
+        stats["skipped"] += 1
+        return
 
-            # 4. Success - Update Content & Restore Status
-            if current_status != "Active":
-                logger.info(f"✅ 链接恢复: {title} -> 恢复 Active")
-                # Will be updated in save_to_notion call below
+    # 3. Dead Link / Fetch Failure: heal (or mark Broken) in the healing stage
+    if remote_text is None:
+        if cache:
+            cache.forget(source_url)
+        if failures:
+            entry = failures.record(source_url, result.failure or TIMEOUT)
+            logger.info(
+                f"记录失败 ({entry['class']}, 第 {entry['failures']} 次)，"
+                f"下次探测: {datetime.datetime.fromtimestamp(entry['next_check']):%Y-%m-%d %H:%M}"
+            )
+        logger.warning(f"⚠️  链接失效，加入自愈队列: {title}")
+        healer.submit(item)
+        return
 
-            local_md5 = md5_of_text(local_text)
-            remote_md5 = md5_of_text(remote_text)
+    if failures:
+        failures.clear(item["source_url"])
+
+    # 4. Success - Update Content & Restore Status
+    if current_status != "Active":
+        logger.info(f"✅ 链接恢复: {title} -> 恢复 Active")
+        # Will be updated in save_to_notion call below
+
+    new_content = f"{SYNC_PREFIX}{source_url}\n\n{remote_text}"
+
+    # Synced pages store the prefixed content; hand-imported ones may hold the raw text
+    local_md5 = item["local_hash"]
+    remote_md5 = md5_of_text(remote_text)
+    if local_md5 in (md5_of_text(new_content), remote_md5) and current_status == "Active" and not canonical:
+        logger.info(f"⏭️  [MD5 Match] 跳过更新: {title}")
+        stats["skipped"] += 1
+        if not item.get("hash_stored", True):
+            agent.backfill_content_hash(item["page_id"], local_md5, title)
+        if cache:
+            cache.store(source_url, result.etag, result.last_modified, local_md5)
+        return
 
-            if local_md5 == remote_md5 and current_status == "Active":
-                logger.info(f"⏭️  [MD5 Match] 跳过更新: {title}")
-                stats["skipped"] += 1
-                continue
+    logger.info(f"检测到上游变更或状态修复: {title}")
 
-            new_content = f"自动同步自 Source：{source_url}\n\n{remote_text}"
-            logger.info(f"检测到上游变更或状态修复: {title}")
+    res = agent.save_to_notion(
+        title=title,
+        content=new_content,
+        tag=tag_name,
+        url=source_url,
+        status="Active",
+    )
+    stats[res] = stats.get(res, 0) + 1
+    # Only trust a future 304 once this body is actually in Notion
+    if cache and res != "error":
+        cache.store(source_url, result.etag, result.last_modified, md5_of_text(new_content))
+
+def load_sync_state() -> Dict[str, Any]:
+    state = load_json(SYNC_STATE_PATH, {}) or {}
+    if state.get("database_id") != NOTION_DATABASE_ID:
+        return {"database_id": NOTION_DATABASE_ID, "checked": {}}
+    state.setdefault("checked", {})
+    return state
+
+def process_sync_items(
+    agent: NotionAgent,
+    items: List[Dict[str, Any]],
+    pool: ThreadPoolExecutor,
+    limiter: HostLimiter,
+    stats: Dict[str, int],
+    checked: Dict[str, Dict[str, Any]],
+    healer: HealingStage,
+    cache: Optional[ValidatorCache] = None,
+    failures: Optional[FailureCache] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> None:
+    """Fetch the Sources of a batch concurrently and apply the update decision to each."""
+    futures = {}
+    for item in items:
+        # 1. Self-managed / AI Created (No Source)
+        if not item["source_url"]:
+            checked.pop(item["page_id"], None)
+            if item["status"] != "Active":
+                logger.info(f"自建内容状态修复: {item['title']} -> Active")
+                res = agent.save_to_notion(
+                    title=item["title"], content=item_local_text(item), tag=item["tag"], url=None, status="Active"
+                )
+                stats[res] = stats.get(res, 0) + 1
+            continue
 
-            res = agent.save_to_notion(
-                title=title,
-                content=new_content,
-                tag=tag_name,
-                url=source_url,
-                status="Active",
-            )
-            stats[res] = stats.get(res, 0) + 1
+        # Known-failing Sources are only probed on their backoff schedule
+        if failures and not failures.due(item["source_url"]):
+            logger.info(f"⏳ 失败退避中，跳过探测: {item['title']}")
+            stats["skipped"] += 1
+            checked[item["page_id"]] = {"title": item["title"], "tag": item["tag"], "checked_at": time.time()}
+            continue
 
-        if not resp.get("has_more"):
-            break
+        # 2. Remote Fetch with Retry (concurrent). Only Active pages whose Content is
+        # still what the cached validators were synced into may short-circuit on 304;
+        # anything else (other pages sharing the Source, edits made in Notion,
+        # non-Active status) needs the body.
+        conditional = (
+            cache if cache and item["status"] == "Active" and cache.matches(item["source_url"], item["local_hash"])
+            else None
+        )
+        future = pool.submit(resolve_source, item["source_url"], limiter, conditional, breaker)
+        futures[future] = item
+
+    for future in as_completed(futures):
+        item = futures[future]
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"抓取任务异常 {item['source_url']}: {e}")
+            result = FetchResult(item["source_url"])
+        if (
+            breaker
+            and not result.deferred
+            and result.failure in (TIMEOUT, SERVER_ERROR)
+            and breaker.host_failing(item["source_url"])
+        ):
+            # Other URLs on the host are failing too (circuit not yet open):
+            # an outage, not a dead link
+            result.deferred = True
+        if result.deferred and failures:
+            deferrals = failures.deferrals(item["source_url"])
+            if deferrals >= CIRCUIT_MAX_DEFERRALS:
+                logger.warning(f"上游主机已连续 {deferrals} 次不可用，按失效处理: {item['title']}")
+                result.deferred = False
+        checked_at = time.time()
+        try:
+            apply_source_result(agent, item, result, stats, healer, cache, failures)
+        except Exception as e:
+            logger.error(f"处理页面失败 {item['title']}: {e}")
+            stats["error"] += 1
+            checked_at = 0  # due again next cycle
+        if result.deferred:
+            # Status untouched: due again once the failure backoff allows
+            checked_at = 0
+        checked[item["page_id"]] = {"title": item["title"], "tag": item["tag"], "checked_at": checked_at}
+
+def due_recheck_items(agent: NotionAgent, checked: Dict[str, Dict[str, Any]], seen: set) -> List[Dict[str, Any]]:
+    """Pages unchanged on the Notion side whose Source is due for an upstream recheck."""
+    cutoff = time.time() - UPSTREAM_RECHECK_HOURS * 3600
+    index = agent.ensure_index(max_age=None)
+    items = []
+    for page_id, rec in list(checked.items()):
+        if page_id in seen or rec.get("checked_at", 0) > cutoff:
+            continue
+        entry = index.get(rec.get("title"))
+        if not entry or entry.get("page_id") != page_id or not entry.get("source"):
+            # Renamed, deleted or no longer sourced; the next full rescan re-learns it
+            checked.pop(page_id, None)
+            continue
+        items.append({
+            "page_id": page_id,
+            "title": rec["title"],
+            "source_url": entry["source"],
+            "tag": rec.get("tag") or "Skill",
+            "status": entry.get("status") or "Active",
+            "content_prop": None,
+            "local_hash": entry.get("hash"),
+            "hash_stored": entry.get("hash_stored", True),
+        })
+    return items
+
+def sync_existing_sources(notion_client: Client, agent: NotionAgent, full: bool = False) -> Dict[str, int]:
+    """
+    Re-check every page's Source against Notion content.
 
-        start_cursor = resp.get("next_cursor")
+    Incremental by default: only pages edited in Notion since the last successful
+    cycle (watermark) are queried, plus pages whose upstream recheck is due
+    (UPSTREAM_RECHECK_HOURS), read from the persisted title index. A full scan
+    runs when requested, on first run, or every FULL_RESCAN_DAYS.
+    """
+    logger.info("开始存量更新：基于 Source 链接巡检")
+    logger.info(f"并发抓取配置: workers={FETCH_WORKERS}, per_host={FETCH_PER_HOST}")
+    stats = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
+    limiter = HostLimiter(FETCH_PER_HOST)
+    cache = ValidatorCache()
+    failures = FailureCache()
+    search = SearchCache()
+    breaker = CircuitBreaker()
+
+    state = load_sync_state()
+    cycle_start = iso(utc_now())
+    watermark = parse_iso(state.get("watermark"))
+    last_full = parse_iso(state.get("last_full"))
+    now = utc_now()
+
+    if not full and (
+        watermark is None
+        or last_full is None
+        or now - last_full > datetime.timedelta(days=FULL_RESCAN_DAYS)
+        or not agent.use_index
+        or not agent.has_persisted_index()
+    ):
+        full = True
+
+    checked: Dict[str, Dict[str, Any]] = {} if full else state["checked"]
+    seen: set = set()
+    query_filter: Optional[Dict[str, Any]] = None
+    if full:
+        logger.info("巡检模式: 全量扫描")
+    else:
+        since = watermark - datetime.timedelta(seconds=WATERMARK_OVERLAP)
+        query_filter = {
+            "timestamp": "last_edited_time",
+            "last_edited_time": {"on_or_after": since.strftime("%Y-%m-%dT%H:%M:%S.000Z")},
+        }
+        logger.info(f"巡检模式: 增量 (Notion 变更自 {since.isoformat()})")
 
+    completed = True
+    with ThreadPoolExecutor(max_workers=max(1, FETCH_WORKERS), thread_name_prefix="fetch") as pool:
+        # Broken pages are healed concurrently while the sync moves on
+        healer = HealingStage(agent, pool, limiter, stats, search, breaker)
+        try:
+            if full:
+                # Rebuild the persisted index from the batches this scan fetches anyway,
+                # so later cycles can run incrementally without a second full pagination
+                rebuild = agent.rebuilding_index() if agent.use_index else nullcontext(lambda pages: None)
+                with rebuild as fold_into_index:
+                    for results in iter_database_batches():
+                        fold_into_index(results)
+                        items = [i for i in (parse_sync_page(p) for p in results) if i]
+                        seen.update(i["page_id"] for i in items)
+                        process_sync_items(
+                            agent, items, pool, limiter, stats, checked, healer, cache, failures, breaker
+                        )
+            else:
+                changed = [p for batch in iter_database_batches(filter_=query_filter) for p in batch]
+                agent.merge_into_index(changed)
+                items = [i for i in (parse_sync_page(p) for p in changed) if i]
+                seen.update(i["page_id"] for i in items)
+                logger.info(f"Notion 侧变更页面: {len(items)}")
+                process_sync_items(agent, items, pool, limiter, stats, checked, healer, cache, failures, breaker)
+
+                due = due_recheck_items(agent, checked, seen)
+                logger.info(f"到期上游复查页面: {len(due)}")
+                for i in range(0, len(due), 100):
+                    process_sync_items(agent, due[i:i + 100], pool, limiter, stats, checked, healer, cache, failures, breaker)
+        except Exception as e:
+            logger.error(f"Notion Request Failed: {e}")
+            completed = False
+        finally:
+            healer.close()
+
+    # Only a completed cycle may advance the watermark
+    if completed:
+        state["watermark"] = cycle_start
+        if full:
+            state["last_full"] = cycle_start
+    state["checked"] = checked
+    try:
+        save_json_atomic(SYNC_STATE_PATH, state)
+        cache.save()
+        failures.prune()
+        failures.save()
+        search.save()
+    except OSError as e:
+        logger.error(f"保存同步状态失败: {e}")
+
+    if breaker.open_hosts():
+        logger.warning(f"本轮熔断的上游主机: {', '.join(breaker.open_hosts())}（{stats.get('deferred', 0)} 个页面延后处理）")
+    if search.hits or search.misses:
+        logger.info(f"搜索缓存: 命中 {search.hits} 次，实际查询 {search.misses} 次")
     logger.info("存量更新完成")
     return stats
 
@@ -348,22 +808,19 @@ def discover_new_rules(agent: NotionAgent) -> Dict[str, int]:
                 status="Active",
             )
             stats[res] = stats.get(res, 0) + 1
-            
-            # Be polite to the server
-            time.sleep(1)
 
     logger.info("增量发现流程完成")
     return stats
 
-def run_once() -> None:
+def run_once(full: bool = False) -> None:
     validate_env()
-    agent = NotionAgent()
-    client = Client(auth=NOTION_TOKEN)
+    agent = NotionAgent(persist_index=True)
+    client = build_notion_client(NOTION_TOKEN)
 
     logger.info("开始本轮巡检：存量更新 + 增量发现")
     
     # Run tasks and aggregate stats
-    s1 = sync_existing_sources(client, agent)
+    s1 = sync_existing_sources(client, agent, full=full)
     s2 = discover_new_rules(agent)
     
     total_created = s1["created"] + s2["created"]
@@ -373,6 +830,8 @@ def run_once() -> None:
     report_msg = (
         f"✅ 新增: {total_created} | 🔄 更新: {total_updated} | ⏭️ 跳过: {total_skipped}"
     )
+    if s1.get("deferred"):
+        report_msg += f" | ⏸️ 延后: {s1['deferred']}"
     logger.info(report_msg)
     
     # Run Backup (Once per cycle, effectively daily in current loop)
@@ -387,13 +846,19 @@ def run_once() -> None:
     send_telegram_message(f"<b>巡检报告</b>\n{report_msg}")
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Notion Agent Brain (7x24h auto-inspection)")
+    parser.add_argument("--full", action="store_true", help="Force a full Notion rescan on the first cycle")
+    args = parser.parse_args()
+
     validate_env()
     logger.info("Agent Brain initialized (7x24h auto-inspection mode)")
     
+    full = args.full
     while True:
         start = time.time()
         try:
-            run_once()
+            run_once(full=full)
+            full = False
         except KeyboardInterrupt:
             logger.info("收到中断信号，退出巡检")
             break
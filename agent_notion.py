@@ -3,13 +3,25 @@ import sys
 import time
 import hashlib
 import argparse
-import requests
-from typing import List, Optional, Dict, Any
+import asyncio
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Dict, Any, Iterator, Tuple
 from dotenv import load_dotenv
-from notion_client import Client
+from notion_client import AsyncClient, Client
 from notion_client.errors import APIResponseError
 from colorama import init, Fore, Style
 
+from http_transport import (
+    NOTION_ASYNC_CONCURRENCY,
+    build_async_notion_client,
+    build_notion_client,
+    notion_session,
+    notion_url,
+)
+from state_store import file_lock, state_path, load_json, save_json_atomic, remove_file
+
 # Initialize colorama
 init(autoreset=True)
 
@@ -22,9 +34,16 @@ load_dotenv()
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
 
-MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds
 MAX_BLOCK_LENGTH = 1800  # Safe limit below 2000
+CONTENT_HASH_PROPERTY = "Content Hash"  # rich_text holding md5(Content); created by update_schema.py
+
+# Title -> page index (see NotionAgent.build_index)
+INDEX_PATH = state_path("notion_index.json")
+INDEX_MAX_AGE = int(os.getenv("NOTION_INDEX_MAX_AGE", "3600"))  # seconds before a persisted index is rebuilt
+
+# Bulk upserts (see NotionAgent.save_many)
+LOOKUP_BATCH = 100  # titles per OR'd existence query (Notion's compound filter limit)
+SAVE_WORKERS = int(os.getenv("NOTION_SAVE_WORKERS", "8"))
 
 # -----------------------------------------------------------------------------
 # Helper Functions
@@ -74,37 +93,34 @@ def build_rich_text_segments(content: str) -> List[dict]:
         )
     return segments
 
-def extract_plain_rich_text(prop: dict) -> str:
-    """Extract plain_text from a rich_text property list."""
-    if not prop or prop.get("type") != "rich_text":
-        return ""
-    rich_list = prop.get("rich_text", [])
+def join_rich_text(items: List[dict]) -> str:
+    """Join the plain text of a rich_text/title item list."""
     buf: List[str] = []
-    for item in rich_list:
+    for item in items:
         txt = item.get("plain_text")
         if txt is None:
             # Fallback to nested text.content
-            text_obj = item.get("text", {})
-            txt = (text_obj.get("content") or "")
+            txt = (item.get("text") or {}).get("content") or ""
         buf.append(txt)
     return "".join(buf)
 
+def extract_plain_rich_text(prop: dict) -> str:
+    """Extract plain_text from a rich_text property."""
+    if not prop or prop.get("type") != "rich_text":
+        return ""
+    return join_rich_text(prop.get("rich_text", []))
+
 def get_page_by_name(client: Client, title: str) -> Optional[dict]:
     """Query the target database by the Name(title) equals filter."""
     try:
         # Direct request to bypass potential library version issues with query
-        url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
-        headers = {
-            "Authorization": f"Bearer {NOTION_TOKEN}",
-            "Notion-Version": "2022-06-28",
-            "Content-Type": "application/json"
-        }
+        url = notion_url(f"databases/{NOTION_DATABASE_ID}/query")
         payload = {
             "filter": {"property": "Name", "title": {"equals": title}},
             "page_size": 1
         }
         
-        resp = requests.post(url, headers=headers, json=payload, timeout=10)
+        resp = notion_session().post(url, json=payload)
         
         if resp.status_code == 200:
             results = resp.json().get("results", [])
@@ -117,113 +133,851 @@ def get_page_by_name(client: Client, title: str) -> Optional[dict]:
         print_error(f"Query by Name failed: {e}")
         return None
 
+def build_hash_property(content_hash: str) -> dict:
+    """Property payload for the Content Hash column."""
+    return {"rich_text": [{"type": "text", "text": {"content": content_hash}}]}
+
+# -----------------------------------------------------------------------------
+# Page Records
+# -----------------------------------------------------------------------------
+
+class PageRecord:
+    """Compact, parsed view of one database page (see parse_page)."""
+    __slots__ = (
+        "page_id", "title", "type", "status", "source", "content",
+        "content_hash", "hash_stored", "created_time", "last_edited_time", "url",
+    )
+
+    def __init__(self, page_id: Optional[str], title: str = "", type: Optional[str] = None,
+                 status: Optional[str] = None, source: Optional[str] = None, content: Optional[str] = None,
+                 content_hash: Optional[str] = None, hash_stored: bool = False,
+                 created_time: Optional[str] = None, last_edited_time: Optional[str] = None,
+                 url: Optional[str] = None):
+        self.page_id = page_id
+        self.title = title
+        self.type = type
+        self.status = status
+        self.source = source
+        self.content = content  # None when parsed with content=False
+        self.content_hash = content_hash
+        self.hash_stored = hash_stored
+        self.created_time = created_time
+        self.last_edited_time = last_edited_time
+        self.url = url
+
+    def __repr__(self) -> str:
+        return f"PageRecord({self.page_id!r}, {self.title!r}, status={self.status!r})"
+
+def parse_page(page: dict, content: bool = True) -> PageRecord:
+    """
+    Parse a raw Notion page in one pass over its properties.
+
+    content=False skips joining the Content segments when the stored Content
+    Hash makes them unnecessary (they are still joined to compute a missing hash).
+    """
+    title = ""
+    tag = status = source = stored_hash = None
+    content_items: List[dict] = []
+
+    for name, prop in page.get("properties", {}).items():
+        if not prop:
+            continue
+        p_type = prop.get("type")
+        if name == "Name" or p_type == "title":
+            if p_type == "title":
+                title = join_rich_text(prop.get("title", []))
+        elif name == "Type":
+            tag = (prop.get("select") or {}).get("name") if p_type == "select" else None
+        elif name == "Status":
+            # Native status, or the legacy select variant
+            status = (prop.get("status") or prop.get("select") or {}).get("name")
+        elif name == "Source":
+            source = prop.get("url") if p_type == "url" else None
+        elif name == "Content":
+            content_items = prop.get("rich_text", []) if p_type == "rich_text" else []
+        elif name == CONTENT_HASH_PROPERTY and p_type == "rich_text":
+            stored_hash = join_rich_text(prop.get("rich_text", [])).strip() or None
+
+    text = join_rich_text(content_items) if (content or not stored_hash) else None
+    return PageRecord(
+        page_id=page.get("id"),
+        title=title,
+        type=tag,
+        status=status,
+        source=source,
+        content=text if content else None,
+        content_hash=stored_hash or md5_of_text(text),
+        hash_stored=bool(stored_hash),
+        created_time=page.get("created_time"),
+        last_edited_time=page.get("last_edited_time"),
+        url=page.get("url"),
+    )
+
+# -----------------------------------------------------------------------------
+# Upsert Helpers (shared by NotionAgent and AsyncNotionAgent)
+# -----------------------------------------------------------------------------
+
+def validate_item(title: str, content: str) -> bool:
+    if not title:
+        print_error("Title is required.")
+        return False
+    if not content:
+        print_error("Content is required.")
+        return False
+    return True
+
+def normalize_tag(tag: Optional[str]) -> str:
+    valid_tags = ["Skill", "MCP"]
+    if tag not in valid_tags:
+        return "Skill" # Default fallback
+    return tag
+
+def build_page_properties(title: str, content: str, tag: str, url: Optional[str], status: str,
+                          content_hash: Optional[str] = None) -> dict:
+    """Full property payload for one knowledge item (Content chunked, tag normalized)."""
+    properties = {
+        "Name": {"title": [{"text": {"content": title}}]},
+        "Type": {"select": {"name": normalize_tag(tag)}},
+        "Status": {"status": {"name": status}},
+        "Content": {
+            "rich_text": build_rich_text_segments(content)
+        },
+    }
+
+    if url:
+        properties["Source"] = {"url": url}
+
+    if content_hash:
+        properties[CONTENT_HASH_PROPERTY] = build_hash_property(content_hash)
+    return properties
+
+def needs_write(existing: Dict[str, Any], new_md5: str, status: str, url: Optional[str]) -> bool:
+    """Whether an existing page differs from the item in Content, Status or Source."""
+    content_changed = (new_md5 != existing["hash"])
+    status_changed = (existing["status"] != status)
+    url_changed = (existing["source"] != url) if url else False
+    return content_changed or status_changed or url_changed
+
+def changed_properties(existing: Dict[str, Any], content: str, tag: str, url: Optional[str], status: str,
+                       new_md5: str, with_hash: bool) -> dict:
+    """
+    Only the properties that differ from the index entry, so e.g. a Status
+    flip is a tiny PATCH instead of re-uploading every Content segment.
+    """
+    properties: Dict[str, Any] = {}
+    if new_md5 != existing["hash"]:
+        properties["Content"] = {"rich_text": build_rich_text_segments(content)}
+    if with_hash and ("Content" in properties or existing.get("hash_stored") is False):
+        # Ride along to backfill pages that predate the column
+        properties[CONTENT_HASH_PROPERTY] = build_hash_property(new_md5)
+    if existing["status"] != status:
+        properties["Status"] = {"status": {"name": status}}
+    if url and existing["source"] != url:
+        properties["Source"] = {"url": url}
+    tag = normalize_tag(tag)
+    if existing.get("type") != tag:
+        properties["Type"] = {"select": {"name": tag}}
+    return properties
+
+def is_stale_page_error(e: Exception) -> bool:
+    """Update failures meaning the indexed page was archived/deleted behind our back."""
+    return isinstance(e, APIResponseError) and (e.status == 404 or "archived" in str(e).lower())
+
+def iter_database_batches(
+    database_id: Optional[str] = None,
+    filter_: Optional[Dict[str, Any]] = None,
+    sorts: Optional[List[Dict[str, Any]]] = None,
+    filter_properties: Optional[List[str]] = None,
+) -> Iterator[List[dict]]:
+    """
+    Stream a database query one result batch (<=100 pages) at a time.
+    The next cursor is fetched in the background while the caller processes
+    the current batch. filter_properties limits the returned properties to
+    the given property IDs. Raises RuntimeError on API failure.
+    """
+    url = notion_url(f"databases/{database_id or NOTION_DATABASE_ID}/query")
+    params = [("filter_properties", prop) for prop in filter_properties or []]
+
+    def fetch(cursor: Optional[str]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"page_size": 100}
+        if filter_:
+            payload["filter"] = filter_
+        if sorts:
+            payload["sorts"] = sorts
+        if cursor:
+            payload["start_cursor"] = cursor
+        resp = notion_session().post(url, json=payload, params=params)
+        if resp.status_code != 200:
+            raise RuntimeError(f"Database query failed: {resp.status_code} {resp.text}")
+        return resp.json()
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="notion-prefetch") as pool:
+        pending = pool.submit(fetch, None)
+        while pending is not None:
+            data = pending.result()
+            pending = pool.submit(fetch, data.get("next_cursor")) if data.get("has_more") else None
+            results = data.get("results", [])
+            if results:
+                yield results
+
+def iter_database_pages(
+    database_id: Optional[str] = None,
+    filter_: Optional[Dict[str, Any]] = None,
+    sorts: Optional[List[Dict[str, Any]]] = None,
+) -> Iterator[dict]:
+    """Like iter_database_batches, but yields pages one by one."""
+    for batch in iter_database_batches(database_id, filter_, sorts):
+        yield from batch
+
+def index_entry_from_record(record: PageRecord) -> Dict[str, Any]:
+    """Reduce a parsed page to the fields the upsert comparison needs."""
+    return {
+        "page_id": record.page_id,
+        "hash": record.content_hash,
+        "hash_stored": record.hash_stored,
+        "status": record.status,
+        "source": record.source,
+        "type": record.type,
+    }
+
+def index_entry_from_page(page: dict) -> Dict[str, Any]:
+    """index_entry_from_record for a raw Notion page."""
+    return index_entry_from_record(parse_page(page, content=False))
+
+def invalidate_persisted_index() -> None:
+    """Drop the persisted title index so the next agent rebuilds it."""
+    remove_file(INDEX_PATH)
+
+class UpsertPlan:
+    """
+    The create/update/skip decision for one item against its index entry.
+    Built by plan_upsert and executed by both NotionAgent and AsyncNotionAgent,
+    so the two only differ in how they send `properties`.
+    """
+    __slots__ = ("title", "action", "page_id", "properties", "entry", "existing")
+
+    def __init__(self, title: str, action: str, page_id: Optional[str], properties: Dict[str, Any],
+                 entry: Optional[Dict[str, Any]], existing: Optional[Dict[str, Any]]):
+        self.title = title
+        self.action = action          # 'create', 'update' or 'skip'
+        self.page_id = page_id
+        self.properties = properties  # empty for a skip without hash backfill
+        self.entry = entry            # index entry once the write succeeds
+        self.existing = existing
+
+def plan_upsert(title: str, content: str, tag: str, url: Optional[str], status: str,
+                existing: Optional[Dict[str, Any]], with_hash: bool) -> UpsertPlan:
+    """Decide what an upsert must write, without touching Notion."""
+    new_md5 = md5_of_text(content)
+
+    if not existing:
+        properties = build_page_properties(
+            title, content, tag, url, status,
+            content_hash=new_md5 if with_hash else None,
+        )
+        entry = {
+            "page_id": None,
+            "hash": new_md5,
+            "hash_stored": CONTENT_HASH_PROPERTY in properties,
+            "status": status,
+            "source": url,
+            "type": normalize_tag(tag),
+        }
+        return UpsertPlan(title, "create", None, properties, entry, None)
+
+    page_id = existing["page_id"]
+    if not needs_write(existing, new_md5, status, url):
+        if with_hash and existing.get("hash_stored") is False:
+            # Lazily backfill pages written before the Content Hash column existed
+            return UpsertPlan(
+                title, "skip", page_id, {CONTENT_HASH_PROPERTY: build_hash_property(new_md5)},
+                dict(existing, hash=new_md5, hash_stored=True), existing,
+            )
+        return UpsertPlan(title, "skip", page_id, {}, existing, existing)
+
+    # Changed properties only
+    properties = changed_properties(existing, content, tag, url, status, new_md5, with_hash)
+    entry = {
+        "page_id": page_id,
+        "hash": new_md5,
+        "hash_stored": CONTENT_HASH_PROPERTY in properties or existing.get("hash_stored", False),
+        "status": status,
+        "source": url or existing["source"],
+        "type": normalize_tag(tag),
+    }
+    return UpsertPlan(title, "update", page_id, properties, entry, existing)
+
+class BatchResult:
+    """Outcome of save_many: one result string per item (input order) plus timing."""
+    __slots__ = ("results", "elapsed", "lookup_time")
+
+    def __init__(self, results: List[str], elapsed: float, lookup_time: float = 0.0):
+        self.results = results
+        self.elapsed = elapsed
+        self.lookup_time = lookup_time
+
+    def counts(self) -> Dict[str, int]:
+        counts = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
+        for result in self.results:
+            counts[result] = counts.get(result, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        c = self.counts()
+        rate = len(self.results) / self.elapsed if self.elapsed > 0 else 0.0
+        return (
+            f"批量写入 {len(self.results)} 条：新增 {c['created']}，更新 {c['updated']}，"
+            f"跳过 {c['skipped']}，失败 {c['error']}；耗时 {self.elapsed:.1f}s"
+            f"（查重 {self.lookup_time:.1f}s，{rate:.1f} 条/s）"
+        )
+
 # -----------------------------------------------------------------------------
 # Core Logic Class
 # -----------------------------------------------------------------------------
 
 class NotionAgent:
-    def __init__(self):
+    def __init__(self, use_index: bool = True, persist_index: bool = False):
+        """
+        use_index: resolve existing pages through an in-memory title index built
+            from a single paginated scan, instead of one query per upsert.
+        persist_index: also load/save the index under the state directory so
+            short-lived scripts can reuse it (rebuilt after INDEX_MAX_AGE).
+        """
         validate_env()
-        self.client = Client(auth=NOTION_TOKEN)
+        # Rate limiting and 429/5xx retries live in the transport (see rate_limiter.py)
+        self.client = build_notion_client(NOTION_TOKEN)
+        self.use_index = use_index
+        self.persist_index = persist_index
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._index_lock = threading.RLock()
+        # When the index was last brought in line with Notion (scan or merge), not last written
+        self._built_at = 0.0
+        # Titles written (entry) or dropped (None) since the last save, merged into the file
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        # Set after a rebuild: the next save replaces the file instead of merging into it
+        self._replace = False
+        self._has_hash_property: Optional[bool] = None
+        self._defer_saves = 0
+
+    # -- Title Index ----------------------------------------------------------
+
+    def build_index(self) -> Dict[str, Dict[str, Any]]:
+        """Scan the whole database once and map title -> (page_id, hash, status, source)."""
+        index: Dict[str, Dict[str, Any]] = {}
+        print_info("构建标题索引：扫描 Notion 数据库...")
+
+        for page in iter_database_pages():
+            record = parse_page(page, content=False)
+            # Keep the first hit, like the equals-filter query did
+            if record.title and record.title not in index:
+                index[record.title] = index_entry_from_record(record)
+
+        print_info(f"标题索引构建完成，共 {len(index)} 条")
+        return index
+
+    def ensure_index(self, max_age: Optional[float] = INDEX_MAX_AGE) -> Dict[str, Dict[str, Any]]:
+        """Return the index, loading or building it on first use.
+
+        max_age=None accepts a persisted index of any age (the caller is about
+        to bring it up to date, e.g. with merge_into_index).
+        """
+        with self._index_lock:
+            if self._index is not None:
+                return self._index
+
+            self._index = self._load_persisted_index(max_age)
+            if self._index is not None:
+                return self._index
+
+            self._set_built(self.build_index(), time.time())
+            self._save_index()
+            return self._index
+
+    def _set_built(self, index: Dict[str, Dict[str, Any]], built_at: float) -> None:
+        # Caller holds the lock: adopt an index that fully reflects Notion at built_at
+        self._index = index
+        self._built_at = built_at
+        self._pending = {}
+        self._replace = True
+
+    def _load_persisted_index(self, max_age: Optional[float]) -> Optional[Dict[str, Dict[str, Any]]]:
+        if not self.persist_index:
+            return None
+        cached = load_json(INDEX_PATH)
+        if (
+            cached
+            and cached.get("database_id") == NOTION_DATABASE_ID
+            and (max_age is None or time.time() - cached.get("built_at", 0) < max_age)
+        ):
+            self._built_at = cached.get("built_at", 0)
+            self._pending = {}
+            self._replace = False
+            return cached.get("entries", {})
+        return None
+
+    def has_persisted_index(self) -> bool:
+        """Whether a persisted index for this database exists on disk."""
+        cached = load_json(INDEX_PATH)
+        return bool(cached) and cached.get("database_id") == NOTION_DATABASE_ID
+
+    def assume_empty_target(self, resume: bool = False) -> None:
+        """
+        Treat the database as empty, so lookups hit only what this agent wrote
+        (no scan, no queries). resume=True starts from the persisted index of
+        an interrupted run instead.
+        """
+        with self._index_lock:
+            index = self._load_persisted_index(None) if resume else None
+            if index is None:
+                self._set_built({}, time.time())
+            else:
+                self._index = index
+            self._save_index()
+
+    def merge_into_index(self, pages: List[dict]) -> None:
+        """Fold freshly queried pages into the index and mark it fresh."""
+        with self._index_lock:
+            index = self.ensure_index(max_age=None)
+            for page in pages:
+                record = parse_page(page, content=False)
+                if record.title:
+                    index[record.title] = self._pending[record.title] = index_entry_from_record(record)
+            self._built_at = time.time()
+            self._save_index()
+
+    @contextmanager
+    def rebuilding_index(self) -> Iterator[Callable[[List[dict]], None]]:
+        """
+        Rebuild the index from a full scan the caller is paginating anyway,
+        instead of a separate one. Yields fold(pages): call it on each batch
+        before upserting any of its titles. Saved once at the end; if the scan
+        fails the partial index is dropped (memory and disk).
+        """
+        started = time.time()
+        with self._index_lock:
+            self._set_built({}, started)
+            self._defer_saves += 1
+
+        def fold(pages: List[dict]) -> None:
+            with self._index_lock:
+                for page in pages:
+                    record = parse_page(page, content=False)
+                    # Keep the first hit, like build_index
+                    if record.title and record.title not in self._index:
+                        self._index[record.title] = index_entry_from_record(record)
+
+        try:
+            yield fold
+        except BaseException:
+            with self._index_lock:
+                self._index = None
+                if self.persist_index:
+                    invalidate_persisted_index()
+            raise
+        finally:
+            with self._index_lock:
+                self._defer_saves -= 1
+                if not self._defer_saves:
+                    self._save_index()
+
+    def invalidate_index(self, title: Optional[str] = None) -> None:
+        """Forget one title, or the whole index (memory and disk) when title is None."""
+        with self._index_lock:
+            if title is None:
+                self._index = None
+                if self.persist_index:
+                    invalidate_persisted_index()
+            elif self._index is not None:
+                self._index.pop(title, None)
+                self._pending[title] = None
+                self._save_index()
+
+    @contextmanager
+    def deferred_index_saves(self) -> Iterator[None]:
+        """Batch persisted-index writes made inside the block into one save at the end."""
+        with self._index_lock:
+            self._defer_saves += 1
+        try:
+            yield
+        finally:
+            with self._index_lock:
+                self._defer_saves -= 1
+                if not self._defer_saves:
+                    self._save_index()
+
+    def _save_index(self) -> None:
+        """
+        Persist the index. Unless it was just rebuilt, only the titles changed
+        here are merged into the file, under a lock, so concurrent agents
+        (other processes) keep each other's writes.
+        """
+        if not self.persist_index or self._index is None or self._defer_saves:
+            return
+        try:
+            with file_lock(INDEX_PATH):
+                entries, built_at = self._index, self._built_at
+                cached = None if self._replace else load_json(INDEX_PATH)
+                if cached and cached.get("database_id") == NOTION_DATABASE_ID:
+                    entries = cached.get("entries", {})
+                    for title, entry in self._pending.items():
+                        if entry is None:
+                            entries.pop(title, None)
+                        else:
+                            entries[title] = entry
+                    built_at = max(built_at, cached.get("built_at", 0))
+                    # Pick up what the other writers added
+                    self._index.update(entries)
+                save_json_atomic(INDEX_PATH, {
+                    "database_id": NOTION_DATABASE_ID,
+                    "built_at": built_at,
+                    "entries": entries,
+                })
+            self._pending = {}
+            self._replace = False
+        except OSError as e:
+            print_error(f"Failed to persist title index: {e}")
+
+    def _remember(self, title: str, entry: Dict[str, Any]) -> None:
+        if not self.use_index:
+            # We wrote without the index; a persisted copy may now be stale
+            invalidate_persisted_index()
+            return
+        with self._index_lock:
+            if self._index is not None:
+                self._index[title] = self._pending[title] = entry
+                self._save_index()
+
+    def find_existing(self, title: str) -> Optional[Dict[str, Any]]:
+        """Resolve a title to its index entry, via the index or a direct query."""
+        if self.use_index:
+            return self.ensure_index().get(title)
+        page = get_page_by_name(self.client, title)
+        return index_entry_from_page(page) if page else None
+
+    def find_existing_many(self, titles: List[str], refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve many titles at once. Uses the index when one is already loaded
+        or fresh on disk; otherwise one OR'd title query per LOOKUP_BATCH
+        titles, which beats a full scan for small batches. refresh=True always
+        queries and folds the hits into the index (e.g. pages an interrupted
+        run created without persisting them).
+        """
+        titles = list(dict.fromkeys(t for t in titles if t))
+        if self.use_index:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = self._load_persisted_index(INDEX_MAX_AGE)
+                if self._index is not None and not refresh:
+                    return {t: self._index[t] for t in titles if t in self._index}
+
+        found: Dict[str, Dict[str, Any]] = {}
+        wanted = set(titles)
+        for start in range(0, len(titles), LOOKUP_BATCH):
+            chunk = titles[start:start + LOOKUP_BATCH]
+            filter_ = {"or": [{"property": "Name", "title": {"equals": t}} for t in chunk]}
+            for page in iter_database_pages(filter_=filter_):
+                record = parse_page(page, content=False)
+                # Keep the first hit per title, like find_existing
+                if record.title in wanted and record.title not in found:
+                    found[record.title] = index_entry_from_record(record)
+        if refresh and self.use_index:
+            with self._index_lock:
+                for title, entry in found.items():
+                    self._remember(title, entry)
+        return found
+
+    # -- Content Hash ---------------------------------------------------------
+
+    def has_hash_property(self) -> bool:
+        """Whether the database has the Content Hash column (checked once)."""
+        if self._has_hash_property is None:
+            try:
+                db = self.client.databases.retrieve(database_id=NOTION_DATABASE_ID)
+                self._has_hash_property = CONTENT_HASH_PROPERTY in db.get("properties", {})
+            except Exception as e:
+                print_error(f"Schema check failed: {e}")
+                self._has_hash_property = False
+            if not self._has_hash_property:
+                print_info(f"'{CONTENT_HASH_PROPERTY}' 属性不存在，运行 update_schema.py 以启用哈希比对")
+        return self._has_hash_property
+
+    def backfill_content_hash(self, page_id: str, content_hash: str, title: Optional[str] = None) -> bool:
+        """Write the Content Hash of a page that predates the property."""
+        if not self.has_hash_property():
+            return False
+        try:
+            self.client.pages.update(
+                page_id=page_id,
+                properties={CONTENT_HASH_PROPERTY: build_hash_property(content_hash)},
+            )
+        except Exception as e:
+            print_error(f"Content Hash backfill failed for {title or page_id}: {e}")
+            return False
+        if title:
+            self._remember_backfill(title, page_id, content_hash)
+        return True
+
+    def _remember_backfill(self, title: str, page_id: str, content_hash: str) -> None:
+        if not self.use_index:
+            return
+        with self._index_lock:
+            entry = (self._index or {}).get(title)
+            if entry and entry.get("page_id") == page_id:
+                self._remember(title, dict(entry, hash=content_hash, hash_stored=True))
+
+    # -- Upsert ---------------------------------------------------------------
 
     def save_to_notion(self, title: str, content: str, tag: str, url: Optional[str] = None, status: str = "Active") -> str:
         """
         Upsert item into Notion with intelligent dedup (MD5) and long-text handling.
         Returns status: 'created', 'updated', 'skipped', 'error'.
         """
-        if not title:
-            print_error("Title is required.")
+        if not validate_item(title, content):
             return "error"
-        if not content:
-            print_error("Content is required.")
+
+        # 1. Check Existence
+        try:
+            existing = self.find_existing(title)
+        except Exception as e:
+            print_error(f"Existence check failed for '{title}': {e}")
             return "error"
-        
-        # Normalize Tag
-        valid_tags = ["Skill", "MCP"]
-        if tag not in valid_tags:
-            tag = "Skill" # Default fallback
-
-        # Prepare Content Segments (Chunking)
-        rich_segments = build_rich_text_segments(content)
-        new_md5 = md5_of_text(content)
-
-        # Prepare Properties
-        properties = {
-            "Name": {"title": [{"text": {"content": title}}]},
-            "Type": {"select": {"name": tag}},
-            "Status": {"status": {"name": status}},
-            "Content": {
-                "rich_text": rich_segments
-            },
-        }
 
-        if url:
-            properties["Source"] = {"url": url}
+        return self._upsert(title, content, tag, url, status, existing)[0]
 
-        # 1. Check Existence
-        existing_page = get_page_by_name(self.client, title)
+    def _upsert(self, title: str, content: str, tag: str, url: Optional[str], status: str,
+                existing: Optional[Dict[str, Any]]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Create/update/skip against an already resolved index entry; returns (result, entry after)."""
+        plan = plan_upsert(title, content, tag, url, status, existing, self.has_hash_property())
+        try:
+            if plan.action == "create":
+                page = self.client.pages.create(
+                    parent={"database_id": NOTION_DATABASE_ID},
+                    properties=plan.properties,
+                )
+            elif plan.properties:
+                page = self.client.pages.update(page_id=plan.page_id, properties=plan.properties)
+            else:
+                page = None
+        except Exception as e:
+            return self._upsert_failed(plan, e)
+        return self._upsert_done(plan, page)
+
+    def _upsert_done(self, plan: UpsertPlan, page: Optional[dict]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Record a successful plan in the index and report it."""
+        if plan.action == "skip":
+            if plan.properties:
+                self._remember_backfill(plan.title, plan.page_id, plan.entry["hash"])
+            print_info(f"⏭️  [Skipped]: {plan.title}")
+            return "skipped", plan.entry
+
+        entry = plan.entry
+        if plan.action == "create":
+            entry = dict(entry, page_id=(page or {}).get("id"))
+        self._remember(plan.title, entry)
+        if plan.action == "create":
+            print_success(f"[Created]: {plan.title}")
+            return "created", entry
+        print_success(f"🔄 [Updated]: {plan.title}")
+        return "updated", entry
+
+    def _upsert_failed(self, plan: UpsertPlan, e: Exception) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Report a failed plan; returns (result, entry after) like _upsert."""
+        if plan.action == "create":
+            print_error(f"Failed to create '{plan.title}': {e}")
+            return "error", None
+        if plan.action == "skip":
+            # Only the hash backfill failed; the content itself is unchanged
+            print_error(f"Content Hash backfill failed for {plan.title}: {e}")
+            print_info(f"⏭️  [Skipped]: {plan.title}")
+            return "skipped", plan.existing
+        existing = plan.existing
+        if is_stale_page_error(e):
+            # The index entry is stale
+            self.invalidate_index(plan.title)
+            existing = None
+        print_error(f"Update failed for '{plan.title}': {e}")
+        return "error", existing
 
-        if not existing_page:
-            # --- CREATE ---
-            attempt = 0
-            while attempt < MAX_RETRIES:
+    # -- Bulk Upsert ----------------------------------------------------------
+
+    def _plan_batch(self, items: List[Dict[str, Any]], results: List[str]) -> Dict[str, List[int]]:
+        """Group valid item indexes by title (input order kept within a title)."""
+        groups: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            if validate_item(item.get("title"), item.get("content")):
+                groups.setdefault(item["title"], []).append(i)
+            else:
+                results[i] = "error"
+        return groups
+
+    def save_many(self, items: List[Dict[str, Any]], workers: int = SAVE_WORKERS) -> "BatchResult":
+        """
+        Upsert many items. Each item is a dict of save_to_notion keyword
+        arguments (title, content, tag, url, status). Existence is resolved for
+        the whole batch up front (see find_existing_many), then creates and
+        updates run on `workers` threads; items sharing a title run in order.
+        """
+        started = time.monotonic()
+        results = ["error"] * len(items)
+        groups = self._plan_batch(items, results)
+        if not groups:
+            return BatchResult(results, time.monotonic() - started)
+
+        self.has_hash_property()
+        try:
+            existing = self.find_existing_many(list(groups))
+        except Exception as e:
+            print_error(f"Batch existence check failed: {e}")
+            return BatchResult(results, time.monotonic() - started)
+        lookup_time = time.monotonic() - started
+
+        def run(title: str, indexes: List[int]) -> None:
+            entry = existing.get(title)
+            for i in indexes:
+                item = items[i]
                 try:
-                    self.client.pages.create(
-                        parent={"database_id": NOTION_DATABASE_ID},
-                        properties=properties,
+                    results[i], entry = self._upsert(
+                        title, item["content"], item.get("tag"), item.get("url"),
+                        item.get("status") or "Active", entry,
                     )
-                    print_success(f"[Created]: {title}")
-                    return "created"
-                except APIResponseError as e:
-                    attempt += 1
-                    print_error(f"Notion API Error (Attempt {attempt}/{MAX_RETRIES}): {e}")
-                    if attempt < MAX_RETRIES:
-                        time.sleep(RETRY_DELAY)
-                    else:
-                        print_error(f"Failed to create '{title}' after retries.")
-                        return "error"
                 except Exception as e:
-                    print_error(f"Unexpected Error during create: {str(e)}")
-                    return "error"
+                    print_error(f"Unexpected Error for '{title}': {e}")
+
+        # One index write for the whole batch instead of one per item
+        with self.deferred_index_saves(), ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(groups))), thread_name_prefix="notion-save"
+        ) as pool:
+            for future in [pool.submit(run, title, indexes) for title, indexes in groups.items()]:
+                future.result()
+
+        batch = BatchResult(results, time.monotonic() - started, lookup_time)
+        print_info(batch.summary())
+        return batch
+
+# -----------------------------------------------------------------------------
+# Async Agent
+# -----------------------------------------------------------------------------
+
+class AsyncNotionAgent:
+    """
+    Async writer around a NotionAgent: writes go through
+    notion_client.AsyncClient, while the title index, lookups and the
+    create/update/skip decision (plan_upsert) stay with the wrapped agent.
+    save_to_notion/save_many are coroutines with the same result strings.
+
+        async with AsyncNotionAgent(persist_index=True) as agent:
+            results = await agent.save_many(items)
+    """
+    def __init__(self, use_index: bool = True, persist_index: bool = False,
+                 concurrency: int = NOTION_ASYNC_CONCURRENCY):
+        self.agent = NotionAgent(use_index=use_index, persist_index=persist_index)
+        self.concurrency = max(concurrency, 1)
+        # Built lazily: the async client must belong to the running event loop
+        self.async_client: Optional[AsyncClient] = None
+
+    def _aclient(self) -> AsyncClient:
+        if self.async_client is None:
+            self.async_client = build_async_notion_client(NOTION_TOKEN, self.concurrency)
+        return self.async_client
+
+    async def aclose(self) -> None:
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
+
+    async def __aenter__(self) -> "AsyncNotionAgent":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    def assume_empty_target(self, resume: bool = False) -> None:
+        """See NotionAgent.assume_empty_target."""
+        self.agent.assume_empty_target(resume=resume)
+
+    async def find_existing_many(self, titles: List[str], refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+        """See NotionAgent.find_existing_many (run off the loop)."""
+        return await asyncio.to_thread(self.agent.find_existing_many, titles, refresh)
+
+    async def _has_hash_property(self) -> bool:
+        # The schema check runs once, through the sync client
+        if self.agent._has_hash_property is None:
+            await asyncio.to_thread(self.agent.has_hash_property)
+        return bool(self.agent._has_hash_property)
+
+    async def save_to_notion(self, title: str, content: str, tag: str, url: Optional[str] = None, status: str = "Active") -> str:
+        """Coroutine version of NotionAgent.save_to_notion."""
+        if not validate_item(title, content):
             return "error"
-        else:
-            # --- UPDATE / SKIP ---
-            page_id = existing_page["id"]
-            props = existing_page.get("properties", {})
-            
-            # Extract existing content to compare
-            content_prop = props.get("Content")
-            existing_text = extract_plain_rich_text(content_prop)
-            existing_md5 = md5_of_text(existing_text)
-
-            # Check Status
-            status_prop = props.get("Status", {})
-            existing_status = status_prop.get("status", {}).get("name")
-            
-            # Check Source URL
-            source_prop = props.get("Source", {})
-            existing_url = source_prop.get("url")
 
-            # Comparison Logic
-            content_changed = (new_md5 != existing_md5)
-            status_changed = (existing_status != status)
-            url_changed = (existing_url != url) if url else False
+        try:
+            # Lookups go through the sync session; keep them off the loop
+            existing = await asyncio.to_thread(self.agent.find_existing, title)
+        except Exception as e:
+            print_error(f"Existence check failed for '{title}': {e}")
+            return "error"
 
-            if not content_changed and not status_changed and not url_changed:
-                print_info(f"⏭️  [Skipped]: {title}")
-                return "skipped"
+        return (await self._upsert(title, content, tag, url, status, existing))[0]
 
-            # Perform Update
-            try:
-                self.client.pages.update(
-                    page_id=page_id,
-                    properties=properties,
+    async def _upsert(self, title: str, content: str, tag: str, url: Optional[str], status: str,
+                      existing: Optional[Dict[str, Any]]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Execute plan_upsert through the async client (see NotionAgent._upsert)."""
+        plan = plan_upsert(title, content, tag, url, status, existing, await self._has_hash_property())
+        try:
+            if plan.action == "create":
+                page = await self._aclient().pages.create(
+                    parent={"database_id": NOTION_DATABASE_ID},
+                    properties=plan.properties,
                 )
-                print_success(f"🔄 [Updated]: {title}")
-                return "updated"
-            except Exception as e:
-                print_error(f"Update failed for '{title}': {e}")
-                return "error"
+            elif plan.properties:
+                page = await self._aclient().pages.update(page_id=plan.page_id, properties=plan.properties)
+            else:
+                page = None
+        except Exception as e:
+            return self.agent._upsert_failed(plan, e)
+        return self.agent._upsert_done(plan, page)
+
+    async def save_many(self, items: List[Dict[str, Any]]) -> "BatchResult":
+        """
+        Coroutine version of NotionAgent.save_many: same batched existence
+        lookup, with up to self.concurrency upserts in flight.
+        """
+        started = time.monotonic()
+        results = ["error"] * len(items)
+        groups = self.agent._plan_batch(items, results)
+        if not groups:
+            return BatchResult(results, time.monotonic() - started)
+
+        try:
+            await self._has_hash_property()
+            existing = await asyncio.to_thread(self.agent.find_existing_many, list(groups))
+        except Exception as e:
+            print_error(f"Batch existence check failed: {e}")
+            return BatchResult(results, time.monotonic() - started)
+        lookup_time = time.monotonic() - started
+
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def run(title: str, indexes: List[int]) -> None:
+            entry = existing.get(title)
+            for i in indexes:
+                item = items[i]
+                async with slots:
+                    try:
+                        results[i], entry = await self._upsert(
+                            title, item["content"], item.get("tag"), item.get("url"),
+                            item.get("status") or "Active", entry,
+                        )
+                    except Exception as e:
+                        print_error(f"Unexpected Error for '{title}': {e}")
+
+        # One index write for the whole batch instead of one per item
+        with self.agent.deferred_index_saves():
+            await asyncio.gather(*(run(title, indexes) for title, indexes in groups.items()))
+
+        batch = BatchResult(results, time.monotonic() - started, lookup_time)
+        print_info(batch.summary())
+        return batch
 
 # -----------------------------------------------------------------------------
 # CLI Entry Point
@@ -239,7 +993,8 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
-    agent = NotionAgent()
+    # A single upsert is cheaper as one filtered query than a full index scan
+    agent = NotionAgent(use_index=False)
     agent.save_to_notion(
         title=args.title,
         content=args.content,
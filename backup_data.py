@@ -1,315 +1,255 @@
 import os
+import re
 import json
 import datetime
-import pprint
 from notion_client import Client
-from typing import List, Dict, Any
-from agent_notion import extract_plain_rich_text, print_info, print_success, print_error
-import time
-
-import requests
-
-def fetch_all_pages(client: Client, database_id: str) -> List[Dict[str, Any]]:
-    """Fetch all pages from the Notion database using pagination via direct HTTP requests."""
-    all_results = []
-    start_cursor = None
-    
-    token = os.getenv("NOTION_TOKEN")
-    if not token:
-        print_error("NOTION_TOKEN missing for backup fetch.")
-        return []
-
-    print_info("开始全量备份：拉取 Notion 数据 (via requests)...")
-    
-    url = f"https://api.notion.com/v1/databases/{database_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    while True:
-        try:
-            payload = {
-                "page_size": 100,
-                "sorts": [{"timestamp": "last_edited_time", "direction": "descending"}]
-            }
-            if start_cursor:
-                payload["start_cursor"] = start_cursor
-            
-            resp = requests.post(url, headers=headers, json=payload, timeout=30)
-            
-            if resp.status_code != 200:
-                print_error(f"Backup fetch failed: {resp.status_code} - {resp.text}")
-                break
-                
-            data = resp.json()
-            results = data.get("results", [])
-            print_info(f"已拉取 {len(results)} 条数据...")
-            all_results.extend(results)
-            
-            if not data.get("has_more"):
-                break
-                
-            start_cursor = data.get("next_cursor")
-            time.sleep(0.5) # Rate limit friendly
-            
-        except Exception as e:
-            print_error(f"Backup fetch exception: {e}")
-            break
-            
-    print_info(f"拉取完成，共 {len(all_results)} 条数据")
-    return all_results
-
-def parse_page(page: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract structured data from a raw Notion page object."""
-    props = page.get("properties", {})
-    
-    # 1. Name (Title)
-    name_prop = props.get("Name") or {}
-    title_items = name_prop.get("title", [])
-    title = ""
-    if title_items:
-        title = title_items[0].get("plain_text") or title_items[0].get("text", {}).get("content", "")
-        
-    # 2. Type (Select)
-    type_prop = props.get("Type") or {}
-    tag_name = "Unknown"
-    if type_prop.get("type") == "select":
-        sel = type_prop.get("select")
-        if sel:
-            tag_name = sel.get("name")
-            
-    # 3. Status (Status)
-    status_prop = props.get("Status") or {}
-    status_name = "Unknown"
-    if status_prop.get("type") == "status":
-        status_name = status_prop.get("status", {}).get("name")
-        
-    # 4. Source (URL)
-    source_prop = props.get("Source") or {}
-    source_url = None
-    if source_prop.get("type") == "url":
-        source_url = source_prop.get("url")
-        
-    # 5. Content (Rich Text)
-    content_prop = props.get("Content") or {}
-    content_text = extract_plain_rich_text(content_prop)
-    
-    # 6. Last Edited Time
-    last_edited = page.get("last_edited_time")
-    
+from typing import IO, Dict, Any, Iterable, Iterator, Optional
+from agent_notion import PageRecord, print_info, print_success, print_error
+
+from http_transport import build_notion_client
+from backup_delta import SnapshotChain
+from backup_store import BackupStore
+from compression import compressed_path, open_text, other_variants
+from notion_mirror import NotionMirror
+from seed_restore import seed_file_suffix, write_seed_file
+from state_store import TMP_PREFIX, atomic_path, remove_file
+
+# "full": every run writes complete JSON/Markdown/seed copies.
+# "delta": runs append changes to the snapshot chain; full copies every BACKUP_FULL_EVERY_DAYS.
+BACKUP_MODE = os.getenv("BACKUP_MODE", "full")
+
+# Dated full copies written before the deduplicated store (skills_<ts>.json, data_seed_<ts>.py, ...)
+LEGACY_BACKUP_RE = re.compile(r"^(?:skills|data_seed)_(\d{8}_\d{4})\.(?:json|md|py|jsonl)(?:\.gz|\.zst)?$")
+
+def backup_record(record: PageRecord) -> Dict[str, Any]:
+    """Convert a PageRecord into the backup record format."""
     return {
-        "Name": title,
-        "Type": tag_name,
-        "Status": status_name,
-        "Source": source_url,
-        "Content": content_text,
-        "Last Edited Time": last_edited,
-        "Notion ID": page.get("id"),
-        "URL": page.get("url")
+        "Name": record.title,
+        "Type": record.type or "Unknown",
+        "Status": record.status or "Unknown",
+        "Source": record.source,
+        "Content": record.content,
+        "Last Edited Time": record.last_edited_time,
+        "Notion ID": record.page_id,
+        "URL": record.url
     }
 
-def generate_markdown(data: List[Dict[str, Any]]) -> str:
-    """Generate a readable Markdown summary."""
-    lines = ["# Notion Database Backup", f"\nBackup Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"]
-    
+def write_json(data: Iterable[Dict[str, Any]], f: IO[str]) -> int:
+    """Stream records as an indented JSON array (same layout as json.dump(indent=2)). Returns the count."""
+    count = 0
     for item in data:
-        lines.append(f"## {item['Name']}")
-        lines.append(f"- **Type**: {item['Type']}")
-        lines.append(f"- **Status**: {item['Status']}")
-        lines.append(f"- **Source**: {item['Source']}")
-        lines.append(f"- **Last Edited**: {item['Last Edited Time']}")
-        lines.append(f"\n**Content**:\n")
-        lines.append(f"```\n{item['Content']}\n```")
-        lines.append("\n---\n")
-        
-    return "\n".join(lines)
+        body = json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        f.write(("[\n  " if count == 0 else ",\n  ") + body)
+        count += 1
+    f.write("\n]" if count else "[]")
+    return count
+
+def iter_markdown_lines(data: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Lines of the readable Markdown summary, one record at a time."""
+    yield "# Notion Database Backup"
+    yield f"\nBackup Time: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
 
-def generate_seed_script(data: List[Dict[str, Any]]) -> str:
-    """Generate a standalone Python script to re-seed the database."""
-    # Convert data to the format expected by agent_notion.py's save_to_notion
-    # agent_notion.save_to_notion(title, content, tag, url, status)
-    
-    seed_list = []
     for item in data:
-        seed_list.append({
+        yield f"## {item['Name']}"
+        yield f"- **Type**: {item['Type']}"
+        yield f"- **Status**: {item['Status']}"
+        yield f"- **Source**: {item['Source']}"
+        yield f"- **Last Edited**: {item['Last Edited Time']}"
+        yield f"\n**Content**:\n"
+        yield f"```\n{item['Content']}\n```"
+        yield "\n---\n"
+
+def write_markdown(data: Iterable[Dict[str, Any]], f: IO[str]) -> None:
+    for i, line in enumerate(iter_markdown_lines(data)):
+        f.write(line if i == 0 else "\n" + line)
+
+def seed_items(data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Map backup records to the keyword arguments of save_to_notion."""
+    for item in data:
+        yield {
             "title": item["Name"],
             "content": item["Content"],
             "tag": item["Type"],
             "url": item["Source"],
             "status": item["Status"]
-        })
-    
-    # Use pprint to ensure valid Python syntax (None instead of null, True instead of true)
-    seed_data_str = pprint.pformat(seed_list, indent=4, width=120, sort_dicts=False)
-    
-    script_content = f'''
+        }
+
+def generate_seed_script() -> str:
+    """The fixed data_seed_latest.py loader; the data lives in the JSONL sidecar next to it."""
+    script_content = '''
 import os
 import sys
-import json
-from typing import List, Dict, Any
 
 # Ensure we can find the agent modules if running from project root
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from agent_notion import NotionAgent, NOTION_TOKEN, NOTION_DATABASE_ID
+    from seed_restore import restore_seed_file
 except ImportError:
-    print("❌ 错误: 找不到 agent_notion.py 模块。请确保此脚本在项目根目录下运行。")
+    print("❌ 错误: 找不到 seed_restore.py 模块。请确保此脚本在项目根目录下运行。")
     sys.exit(1)
 
-# DATA SEED GENERATED AT: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-# TOTAL ITEMS: {len(seed_list)}
+# Seed data is written by backup_data.py as data_seed_latest.jsonl(.gz|.zst)
+SEED_BASENAME = "data_seed_latest"
 
-SEED_DATA: List[Dict[str, Any]] = {seed_data_str}
+def find_seed_file():
+    base = os.path.join(os.path.dirname(os.path.abspath(__file__)), SEED_BASENAME)
+    candidates = [base + suffix for suffix in (".jsonl.zst", ".jsonl.gz", ".jsonl")]
+    existing = [path for path in candidates if os.path.exists(path)]
+    return max(existing, key=os.path.getmtime) if existing else None
 
 def run_seed():
-    print(f"🌱 开始播种数据，共 {{len(SEED_DATA)}} 条...")
-    if not NOTION_TOKEN or not NOTION_DATABASE_ID:
-        print("❌ 错误: 环境变量 NOTION_TOKEN 或 NOTION_DATABASE_ID 未设置")
-        return
-        
-    # NotionAgent initializes from env vars automatically
-    agent = NotionAgent()
-    
-    success_count = 0
-    skip_count = 0
-    
-    for item in SEED_DATA:
-        try:
-            print(f"Processing: {{item['title']}}")
-            # Using save_to_notion which handles upsert (check existence by title)
-            result = agent.save_to_notion(
-                title=item['title'],
-                content=item['content'],
-                tag=item['tag'],
-                url=item['url'],
-                status=item['status']
-            )
-            
-            if result == "created":
-                print(f"✅ Created: {{item['title']}}")
-                success_count += 1
-            elif result == "updated":
-                print(f"🔄 Updated: {{item['title']}}")
-                success_count += 1
-            else:
-                print(f"⏭️ Skipped: {{item['title']}}")
-                skip_count += 1
-                
-        except Exception as e:
-            print(f"❌ Error processing {{item['title']}}: {{e}}")
-            
-    print(f"\\n🎉 播种完成! 成功/更新: {{success_count}}, 跳过: {{skip_count}}")
+    # Records are streamed from the sidecar; pass --fresh-target when restoring
+    # into an empty database to skip existence lookups.
+    path = find_seed_file()
+    if not path:
+        print(f"❌ 错误: 找不到种子数据文件 {SEED_BASENAME}.jsonl(.gz|.zst)")
+        sys.exit(1)
+    restore_seed_file(path)
 
 if __name__ == "__main__":
     run_seed()
 '''
-    return script_content.strip()
-
-def backup_notion_data(client: Client, database_id: str, backup_dir: str = "backups") -> None:
-    """Main backup function."""
+    return script_content.strip() + "\n"
+
+def drop_other_variants(path: str) -> None:
+    """Remove copies of `path` written earlier with a different compression setting."""
+    for stale in other_variants(path):
+        remove_file(stale)
+
+def backup_notion_data(client: Client, database_id: str, backup_dir: str = "backups", fresh: bool = False,
+                       mode: str = BACKUP_MODE) -> None:
+    """
+    Main backup function. Reads from the local mirror after syncing it (full rescan when fresh=True).
+
+    mode="delta" only records pages changed since the previous backup in the
+    snapshot chain (see backup_delta.py); the full JSON/Markdown/seed outputs
+    are written together with the periodic full snapshot.
+    """
     if not os.path.exists(backup_dir):
         os.makedirs(backup_dir)
         
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
     
-    # Fetch and Parse
-    raw_pages = fetch_all_pages(client, database_id)
-    parsed_data = [parse_page(p) for p in raw_pages]
-    
-    # Save JSON
-    json_filename = f"skills_{timestamp}.json"
-    json_path = os.path.join(backup_dir, json_filename)
-    try:
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(parsed_data, f, ensure_ascii=False, indent=2)
-        print_success(f"JSON 备份已保存: {json_path}")
-    except Exception as e:
-        print_error(f"Failed to save JSON backup: {e}")
-        
-    # Save Markdown
-    md_filename = f"skills_{timestamp}.md"
-    md_path = os.path.join(backup_dir, md_filename)
-    try:
-        md_content = generate_markdown(parsed_data)
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(md_content)
-        print_success(f"Markdown 备份已保存: {md_path}")
-    except Exception as e:
-        print_error(f"Failed to save Markdown backup: {e}")
+    # Sync mirror (dropping pages archived since the last full sync); each
+    # writer below then streams rows straight from SQLite, so memory stays
+    # bounded whatever the database size
+    print_info(f"开始{'增量' if mode == 'delta' else '全量'}备份：同步本地镜像...")
+    with NotionMirror(database_id=database_id) as mirror:
+        mirror.ensure_fresh(force=True, full=fresh, check_deleted=True)
+
+        def records(edited_since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+            return (backup_record(r) for r in mirror.iter_pages(edited_since=edited_since))
+
+        if mode == "delta":
+            chain = SnapshotChain(backup_dir)
+            if not chain.full_due(datetime.datetime.now(datetime.timezone.utc)):
+                entry = chain.take(mirror, records)
+                print_success(
+                    f"增量备份已保存: {entry['file']}（变更 {entry['changed']} 条，删除 {entry['deleted']} 条）"
+                )
+                return
+            entry = chain.take(mirror, records, force_full=True)
+            print_success(f"全量快照已保存: {entry['file']}（{entry['records']} 条）")
+
+        # Save the dated backup: a manifest in the deduplicated store (unchanged
+        # Content is not stored again); see backup_store.py to export it
+        try:
+            result = BackupStore(backup_dir).write_manifest(records(), timestamp)
+            print_success(
+                f"备份清单已保存: {result['path']} ({result['records']} 条，新增内容块 {result['new_blobs']} 个)"
+            )
+        except Exception as e:
+            print_error(f"Failed to save backup manifest: {e}")
 
-    # Save Seed Script
-    seed_filename = "data_seed_latest.py"
-    # Also save a timestamped version in backups/
-    seed_backup_filename = f"data_seed_{timestamp}.py"
-    
-    # Save to backups folder
-    seed_backup_path = os.path.join(backup_dir, seed_backup_filename)
-    
-    # Save to root folder (latest)
-    seed_latest_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), seed_filename)
-    
-    try:
-        seed_content = generate_seed_script(parsed_data)
-        
-        # Save timestamped backup
-        with open(seed_backup_path, "w", encoding="utf-8") as f:
-            f.write(seed_content)
-        print_success(f"Seed Script 备份已保存: {seed_backup_path}")
-        
-        # Save latest to root
-        with open(seed_latest_path, "w", encoding="utf-8") as f:
-            f.write(seed_content)
-        print_success(f"最新 Seed Script 已更新: {seed_latest_path}")
-        
-    except Exception as e:
-        print_error(f"Failed to save Seed Script: {e}")
+        # Save JSON (latest readable copy; compressed per BACKUP_COMPRESSION,
+        # read with `python compression.py cat`)
+        json_path = compressed_path(os.path.join(backup_dir, "skills_latest.json"))
+        try:
+            with atomic_path(json_path) as tmp_path, open_text(tmp_path, "w") as f:
+                count = write_json(records(), f)
+            drop_other_variants(json_path)
+            print_success(f"JSON 备份已保存: {json_path} ({count} 条)")
+        except Exception as e:
+            print_error(f"Failed to save JSON backup: {e}")
+
+        # Save Markdown (latest readable copy)
+        md_path = compressed_path(os.path.join(backup_dir, "skills_latest.md"))
+        try:
+            with atomic_path(md_path) as tmp_path, open_text(tmp_path, "w") as f:
+                write_markdown(records(), f)
+            drop_other_variants(md_path)
+            print_success(f"Markdown 备份已保存: {md_path}")
+        except Exception as e:
+            print_error(f"Failed to save Markdown backup: {e}")
+
+        # Save Seed Data (streamed JSONL sidecar + fixed loader script)
+        root_dir = os.path.dirname(os.path.abspath(__file__))
+        seed_latest_path = os.path.join(root_dir, f"data_seed_latest{seed_file_suffix()}")
+        loader_path = os.path.join(root_dir, "data_seed_latest.py")
+
+        try:
+            with atomic_path(seed_latest_path) as tmp_path:
+                count = write_seed_file(seed_items(records()), tmp_path)
+            drop_other_variants(seed_latest_path)
+            print_success(f"最新 Seed 数据已更新: {seed_latest_path} ({count} 条)")
+
+            with atomic_path(loader_path) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(generate_seed_script())
+
+        except Exception as e:
+            print_error(f"Failed to save Seed data: {e}")
 
     # Auto Cleanup Old Backups
     cleanup_old_backups(backup_dir, keep_count=30)
 
 def cleanup_old_backups(backup_dir: str, keep_count: int = 30) -> None:
-    """Keep only the latest N backup files for each type."""
+    """
+    Keep the latest N backup manifests and garbage-collect store blobs no
+    longer referenced by any of them. Legacy dated copies age out after N
+    days, like the manifests that replaced them. Also drops temp files left
+    by crashes.
+    """
     try:
-        files = os.listdir(backup_dir)
-        # Group by extension
-        files_by_ext = {}
-        for f in files:
-            ext = os.path.splitext(f)[1]
-            if ext not in files_by_ext:
-                files_by_ext[ext] = []
-            files_by_ext[ext].append(os.path.join(backup_dir, f))
-            
-        for ext, file_list in files_by_ext.items():
-            # Sort by modification time (newest first)
-            file_list.sort(key=os.path.getmtime, reverse=True)
-            
-            # Identify files to delete
-            to_delete = file_list[keep_count:]
-            
-            if to_delete:
-                print_info(f"正在清理过期备份 ({ext}): {len(to_delete)} 个文件")
-                for f_path in to_delete:
-                    try:
-                        os.remove(f_path)
-                        print(f"  🗑️ Deleted: {os.path.basename(f_path)}")
-                    except Exception as e:
-                        print_error(f"  ❌ Failed to delete {os.path.basename(f_path)}: {e}")
-                        
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=keep_count)
+        legacy = 0
+        for f in os.listdir(backup_dir):
+            if f.startswith(TMP_PREFIX):
+                # Partial write left behind by a crash
+                remove_file(os.path.join(backup_dir, f))
+                continue
+            match = LEGACY_BACKUP_RE.match(f)
+            if match and datetime.datetime.strptime(match.group(1), "%Y%m%d_%H%M") < cutoff:
+                remove_file(os.path.join(backup_dir, f))
+                legacy += 1
+        if legacy:
+            print_info(f"正在清理旧格式备份文件：{legacy} 个")
+
+        stats = BackupStore(backup_dir).gc(keep_count)
+        if stats["manifests"] or stats["blobs"]:
+            print_info(
+                f"正在清理过期备份：清单 {stats['manifests']} 个，未引用内容块 {stats['blobs']} 个"
+                f"（保留 {stats['live_blobs']} 个）"
+            )
+
     except Exception as e:
         print_error(f"Cleanup failed: {e}")
 
 
 if __name__ == "__main__":
     # Test run
+    import argparse
     from dotenv import load_dotenv
     load_dotenv()
+    parser = argparse.ArgumentParser(description="Backup the Notion database")
+    parser.add_argument("--fresh", action="store_true", help="Full mirror rescan before backing up")
+    parser.add_argument("--mode", choices=["full", "delta"], default=BACKUP_MODE,
+                        help="delta: record only changes since the previous backup")
+    args = parser.parse_args()
     token = os.getenv("NOTION_TOKEN")
     db_id = os.getenv("NOTION_DATABASE_ID")
     if token and db_id:
-        client = Client(auth=token)
-        backup_notion_data(client, db_id)
+        client = build_notion_client(token)
+        backup_notion_data(client, db_id, fresh=args.fresh, mode=args.mode)
     else:
         print("Env vars missing")
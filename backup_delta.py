@@ -0,0 +1,215 @@
+import os
+import json
+import hashlib
+import argparse
+import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from agent_notion import NOTION_DATABASE_ID, print_info, print_success, print_error
+from compression import default_method, open_text, SUFFIXES
+from notion_mirror import NotionMirror
+from state_store import WATERMARK_OVERLAP, atomic_path, iso, load_json, parse_iso, remove_file, save_json_atomic, utc_now
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+SNAPSHOT_DIRNAME = "snapshots"  # under the backup dir
+CATALOG_NAME = "catalog.json"  # ordered list of full/delta files in the chain
+PAGE_STATE_NAME = "page_state.json"  # page_id -> [last_edited_time, record hash] at the last backup
+
+BACKUP_FULL_EVERY_DAYS = float(os.getenv("BACKUP_FULL_EVERY_DAYS", "7"))
+BACKUP_KEEP_CHAINS = int(os.getenv("BACKUP_KEEP_CHAINS", "4"))  # full snapshots (with their deltas) kept
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+
+def record_hash(record: Dict[str, Any]) -> str:
+    """Hash of everything a restore would write (edit time excluded, so touches are not changes)."""
+    payload = {k: v for k, v in record.items() if k not in ("Last Edited Time", "Hash")}
+    return hashlib.md5(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _write_jsonl(path: str, lines: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    with atomic_path(path) as tmp_path, open_text(tmp_path, "w") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def _read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    with open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+# -----------------------------------------------------------------------------
+# Snapshot Chain
+# -----------------------------------------------------------------------------
+
+class SnapshotChain:
+    """
+    Full snapshots plus the deltas taken after them, under <backup_dir>/snapshots.
+    A delta holds changed/new records and {"Notion ID", "Deleted": true} tombstones.
+    """
+    def __init__(self, backup_dir: str = "backups"):
+        self.dir = os.path.join(backup_dir, SNAPSHOT_DIRNAME)
+        os.makedirs(self.dir, exist_ok=True)
+        self.catalog_path = os.path.join(self.dir, CATALOG_NAME)
+        self.page_state_path = os.path.join(self.dir, PAGE_STATE_NAME)
+        catalog = load_json(self.catalog_path) or {}
+        if catalog.get("database_id") not in (None, NOTION_DATABASE_ID):
+            # Another database: its chain cannot be extended
+            print_info("快照链对应的数据库已变更，将从全量快照重新开始")
+            catalog = {}
+        self.entries: List[Dict[str, Any]] = catalog.get("entries", [])
+
+    def _save_catalog(self) -> None:
+        save_json_atomic(self.catalog_path, {"database_id": NOTION_DATABASE_ID, "entries": self.entries})
+
+    def last_full(self) -> Optional[Dict[str, Any]]:
+        fulls = [e for e in self.entries if e["kind"] == "full"]
+        return fulls[-1] if fulls else None
+
+    def full_due(self, now: datetime.datetime) -> bool:
+        last_full = self.last_full()
+        if not last_full or not os.path.exists(self.page_state_path):
+            return True
+        return (now - parse_iso(last_full["taken_at"])).total_seconds() > BACKUP_FULL_EVERY_DAYS * 86400
+
+    # -- Write ----------------------------------------------------------------
+
+    def take(self, mirror: NotionMirror, records: Callable[..., Iterable[Dict[str, Any]]],
+             force_full: bool = False) -> Dict[str, Any]:
+        """
+        Append a full snapshot (when due or forced) or a delta to the chain.
+        `records(edited_since=None)` must stream backup records from the mirror.
+        """
+        now = utc_now()
+        stamp = now.strftime("%Y%m%d_%H%M%S")
+        suffix = ".jsonl" + SUFFIXES[default_method()]
+        previous: Dict[str, List[str]] = load_json(self.page_state_path) or {}
+        state: Dict[str, List[str]] = {}
+
+        if force_full or self.full_due(now):
+            kind = "full"
+
+            def lines() -> Iterator[Dict[str, Any]]:
+                for record in records():
+                    h = record_hash(record)
+                    state[record["Notion ID"]] = [record["Last Edited Time"], h]
+                    yield dict(record, Hash=h)
+
+            filename = f"full_{stamp}{suffix}"
+            count = _write_jsonl(os.path.join(self.dir, filename), lines())
+            entry = {"kind": kind, "file": filename, "taken_at": iso(now), "records": count}
+        else:
+            kind = "delta"
+            state = dict(previous)
+            since = parse_iso(self.entries[-1]["taken_at"]) - datetime.timedelta(seconds=WATERMARK_OVERLAP)
+            live = set(mirror.page_ids())
+            deleted = [pid for pid in previous if pid not in live]
+            changed = 0
+
+            def lines() -> Iterator[Dict[str, Any]]:
+                nonlocal changed
+                # Only pages edited since the previous backup are even read
+                for record in records(edited_since=iso(since)):
+                    h = record_hash(record)
+                    pid = record["Notion ID"]
+                    if previous.get(pid, [None, None])[1] == h:
+                        continue
+                    state[pid] = [record["Last Edited Time"], h]
+                    changed += 1
+                    yield dict(record, Hash=h)
+                for pid in deleted:
+                    state.pop(pid, None)
+                    yield {"Notion ID": pid, "Deleted": True}
+
+            filename = f"delta_{stamp}{suffix}"
+            _write_jsonl(os.path.join(self.dir, filename), lines())
+            entry = {
+                "kind": kind, "file": filename, "taken_at": iso(now),
+                "changed": changed, "deleted": len(deleted), "records": len(state),
+            }
+
+        self.entries.append(entry)
+        self._save_catalog()
+        # Page state last: after a crash in between, the next delta merely repeats some changes
+        save_json_atomic(self.page_state_path, state)
+        self.prune()
+        return entry
+
+    def prune(self, keep_chains: int = BACKUP_KEEP_CHAINS) -> None:
+        """Drop whole chains (a full snapshot and its deltas) beyond the newest keep_chains."""
+        full_positions = [i for i, e in enumerate(self.entries) if e["kind"] == "full"]
+        if len(full_positions) <= keep_chains:
+            return
+        cut = full_positions[-keep_chains]
+        for entry in self.entries[:cut]:
+            remove_file(os.path.join(self.dir, entry["file"]))
+        print_info(f"清理过期快照链：{len(self.entries[:cut])} 个文件")
+        self.entries = self.entries[cut:]
+        self._save_catalog()
+
+    # -- Restore --------------------------------------------------------------
+
+    def reconstruct(self, at: Optional[datetime.datetime] = None) -> Dict[str, Dict[str, Any]]:
+        """Replay the newest full snapshot taken at/before `at` and its later deltas up to `at`."""
+        at = at or utc_now()
+        usable = [e for e in self.entries if parse_iso(e["taken_at"]) <= at]
+        fulls = [i for i, e in enumerate(usable) if e["kind"] == "full"]
+        if not fulls:
+            raise ValueError(f"No full snapshot at or before {iso(at)}")
+
+        pages: Dict[str, Dict[str, Any]] = {}
+        for entry in usable[fulls[-1]:]:
+            for line in _read_jsonl(os.path.join(self.dir, entry["file"])):
+                if line.get("Deleted"):
+                    pages.pop(line["Notion ID"], None)
+                else:
+                    pages[line["Notion ID"]] = line
+        return pages
+
+# -----------------------------------------------------------------------------
+# CLI Entry Point
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    from backup_data import seed_items
+    from seed_restore import seed_file_suffix, write_seed_file
+
+    parser = argparse.ArgumentParser(description="Inspect the backup snapshot chain or rebuild a point in time")
+    parser.add_argument("--backup-dir", default="backups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List full snapshots and deltas")
+    restore = sub.add_parser("restore", help="Rebuild the database state at a point in time as a seed file")
+    restore.add_argument("--at", help="ISO time (UTC), e.g. 2026-01-27T22:00:00; default: latest")
+    restore.add_argument("--output", help="Output seed file (default: backups/data_seed_pit_<time>.jsonl.gz)")
+    args = parser.parse_args()
+
+    chain = SnapshotChain(args.backup_dir)
+    if args.command == "list":
+        for e in chain.entries:
+            detail = f"{e['records']} 条" if e["kind"] == "full" else f"变更 {e['changed']}，删除 {e['deleted']}"
+            print(f"{e['taken_at']}  {e['kind']:5}  {e['file']}  ({detail})")
+    else:
+        at = parse_iso(args.at) if args.at else None
+        if args.at and at is None:
+            parser.error(f"--at: invalid ISO timestamp {args.at!r}")
+        try:
+            pages = chain.reconstruct(at)
+        except ValueError as e:
+            print_error(str(e))
+        else:
+            label = (at or utc_now()).strftime("%Y%m%d_%H%M%S")
+            output = args.output or os.path.join(args.backup_dir, f"data_seed_pit_{label}{seed_file_suffix()}")
+            with atomic_path(output) as tmp_path:
+                count = write_seed_file(seed_items(pages.values()), tmp_path)
+            print_success(f"已重建 {count} 条记录: {output}")
+            print_info(f"恢复到 Notion: python seed_restore.py {output}")
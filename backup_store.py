@@ -0,0 +1,346 @@
+import os
+import json
+import hashlib
+import argparse
+import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from agent_notion import print_info, print_success, print_error
+from backup_delta import record_hash
+from compression import compressed_path, default_method, open_text, SUFFIXES
+from state_store import TMP_PREFIX, atomic_path, remove_file
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+OBJECTS_DIRNAME = "objects"  # <backup_dir>/objects/<aa>/<sha256><codec suffix>
+MANIFESTS_DIRNAME = "manifests"  # <backup_dir>/manifests/manifest_<ts>.jsonl<codec suffix>
+MANIFEST_FORMAT = "notion-backup-manifest"
+MANIFEST_VERSION = 2  # 2: per-record Hash plus a closing _summary line (count, total hash)
+MAX_REPORTED_PROBLEMS = 20
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+
+def blob_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _update_total(total: Any, page_id: str, record_digest: str) -> None:
+    # Total hash = sha256 over "<Notion ID>:<record hash>" lines in manifest order
+    total.update(f"{page_id}:{record_digest}\n".encode("utf-8"))
+
+def diff_hashes(backup: Dict[str, str], live: Iterable[Tuple[str, str]]) -> Dict[str, List[str]]:
+    """
+    Compare page_id -> record hash maps. Returns page ids that are
+    "missing" (live only), "extra" (backup only) and "changed".
+    """
+    seen = set()
+    missing, changed = [], []
+    for page_id, digest in live:
+        seen.add(page_id)
+        if page_id not in backup:
+            missing.append(page_id)
+        elif backup[page_id] != digest:
+            changed.append(page_id)
+    extra = [page_id for page_id in backup if page_id not in seen]
+    return {"missing": missing, "extra": extra, "changed": changed}
+
+# -----------------------------------------------------------------------------
+# Content-Addressed Store
+# -----------------------------------------------------------------------------
+
+class BackupStore:
+    """
+    Deduplicated backup storage. Each page Content is stored once as a
+    compressed blob keyed by its SHA-256; a daily manifest lists every record's
+    metadata plus the hash of its Content blob. Unchanged pages cost one
+    manifest line per backup instead of a full copy.
+    """
+    def __init__(self, backup_dir: str = "backups"):
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, OBJECTS_DIRNAME)
+        self.manifests_dir = os.path.join(backup_dir, MANIFESTS_DIRNAME)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    # -- Blobs ----------------------------------------------------------------
+
+    def _blob_path(self, digest: str, suffix: Optional[str] = None) -> str:
+        if suffix is None:
+            suffix = SUFFIXES[default_method()]
+        return os.path.join(self.objects_dir, digest[:2], digest + suffix)
+
+    def find_blob(self, digest: str) -> Optional[str]:
+        # Blobs written under an earlier compression setting remain readable
+        for suffix in SUFFIXES.values():
+            path = self._blob_path(digest, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def put_blob(self, text: str) -> Tuple[str, bool]:
+        """Store `text` unless an identical blob exists. Returns (hash, newly_written)."""
+        digest = blob_hash(text)
+        if self.find_blob(digest):
+            return digest, False
+        with atomic_path(self._blob_path(digest)) as tmp_path, open_text(tmp_path, "w") as f:
+            f.write(text)
+        return digest, True
+
+    def read_blob(self, digest: str) -> str:
+        path = self.find_blob(digest)
+        if not path:
+            raise FileNotFoundError(f"Missing backup blob {digest}")
+        with open_text(path, "r") as f:
+            return f.read()
+
+    def iter_blobs(self) -> Iterator[str]:
+        """Paths of every stored blob."""
+        for shard in os.listdir(self.objects_dir):
+            shard_dir = os.path.join(self.objects_dir, shard)
+            if os.path.isdir(shard_dir):
+                for name in os.listdir(shard_dir):
+                    yield os.path.join(shard_dir, name)
+
+    # -- Manifests ------------------------------------------------------------
+
+    def write_manifest(self, records: Iterable[Dict[str, Any]], timestamp: str) -> Dict[str, Any]:
+        """
+        Stream records into a new manifest, storing each Content as a blob.
+        Each line carries the record hash; the last line holds the record
+        count and total hash, so a truncated manifest is detectable.
+        Returns {"path", "records", "new_blobs", "total_hash"}.
+        """
+        path = os.path.join(self.manifests_dir, f"manifest_{timestamp}.jsonl{SUFFIXES[default_method()]}")
+        count = new_blobs = 0
+        total = hashlib.sha256()
+        with atomic_path(path) as tmp_path, open_text(tmp_path, "w") as f:
+            header = {
+                "format": MANIFEST_FORMAT,
+                "version": MANIFEST_VERSION,
+                "taken_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+            f.write(json.dumps({"_meta": header}, ensure_ascii=False) + "\n")
+            for record in records:
+                line = {k: v for k, v in record.items() if k != "Content"}
+                line["Blob"], written = self.put_blob(record.get("Content") or "")
+                line["Hash"] = record_hash(record)
+                _update_total(total, line["Notion ID"], line["Hash"])
+                new_blobs += written
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+                count += 1
+            f.write(json.dumps({"_summary": {"records": count, "total_hash": total.hexdigest()}}) + "\n")
+        return {"path": path, "records": count, "new_blobs": new_blobs, "total_hash": total.hexdigest()}
+
+    def manifests(self) -> List[str]:
+        """Manifest paths, oldest first (timestamps sort lexically)."""
+        names = [n for n in os.listdir(self.manifests_dir) if n.startswith("manifest_")]
+        return [os.path.join(self.manifests_dir, n) for n in sorted(names)]
+
+    def iter_manifest_lines(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Raw manifest lines (metadata + Blob and record hashes), header and summary skipped."""
+        with open_text(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if "_meta" not in data and "_summary" not in data:
+                    yield data
+
+    def iter_records(self, path: str) -> Iterator[Dict[str, Any]]:
+        """Full backup records of a manifest, Content loaded from blobs one at a time."""
+        for line in self.iter_manifest_lines(path):
+            record = {k: v for k, v in line.items() if k not in ("Blob", "Hash")}
+            record["Content"] = self.read_blob(line["Blob"])
+            yield record
+
+    # -- Verification ---------------------------------------------------------
+
+    def verify(self, path: str, deep: bool = False) -> Dict[str, Any]:
+        """
+        Stream a manifest and check that it is complete and restorable: header,
+        per-record hashes, blob presence, record count and total hash.
+        deep=True also decompresses every blob and recomputes its hashes.
+        Returns {"records", "total_hash", "problems", "hashes"} where hashes maps
+        page_id -> record hash (for diff_hashes against the live database).
+        """
+        problems: List[str] = []
+        hashes: Dict[str, str] = {}
+        total = hashlib.sha256()
+        header = summary = None
+        count = 0
+
+        def problem(message: str) -> None:
+            if len(problems) < MAX_REPORTED_PROBLEMS:
+                problems.append(message)
+            elif len(problems) == MAX_REPORTED_PROBLEMS:
+                problems.append("……（更多问题已省略）")
+
+        try:
+            with open_text(path, "r") as f:
+                for n, raw in enumerate(f, 1):
+                    if not raw.strip():
+                        continue
+                    data = json.loads(raw)
+                    if "_meta" in data:
+                        header = data["_meta"]
+                        continue
+                    if "_summary" in data:
+                        summary = data["_summary"]
+                        continue
+                    if summary is not None:
+                        problem(f"第 {n} 行位于汇总行之后")
+                    count += 1
+                    page_id, digest = data.get("Notion ID"), data.get("Hash")
+                    if not page_id or not digest:
+                        problem(f"第 {n} 行缺少 Notion ID 或 Hash")
+                        continue
+                    hashes[page_id] = digest
+                    _update_total(total, page_id, digest)
+
+                    if not deep:
+                        if not self.find_blob(data.get("Blob") or ""):
+                            problem(f"{data.get('Name')}: 缺少内容块 {data.get('Blob')}")
+                        continue
+                    try:
+                        content = self.read_blob(data.get("Blob") or "")
+                    except FileNotFoundError:
+                        problem(f"{data.get('Name')}: 缺少内容块 {data.get('Blob')}")
+                        continue
+                    if blob_hash(content) != data["Blob"]:
+                        problem(f"{data.get('Name')}: 内容块 {data['Blob']} 已损坏")
+                    record = {k: v for k, v in data.items() if k not in ("Blob", "Hash")}
+                    if record_hash(dict(record, Content=content)) != digest:
+                        problem(f"{data.get('Name')}: 记录哈希不匹配")
+        except (OSError, EOFError, ValueError) as e:
+            # Truncated compressed stream or a half-written line
+            problem(f"读取中断: {e}")
+
+        if not header or header.get("format") != MANIFEST_FORMAT:
+            problem("缺少清单头")
+        elif header.get("version", 1) < 2:
+            problem(f"清单版本 {header.get('version', 1)} 不含记录哈希，无法校验")
+        elif summary is None:
+            problem("缺少汇总行（清单不完整）")
+        else:
+            if summary.get("records") != count:
+                problem(f"记录数不符：汇总 {summary.get('records')}，实际 {count}")
+            if summary.get("total_hash") != total.hexdigest():
+                problem("总哈希不符")
+        return {"records": count, "total_hash": total.hexdigest(), "problems": problems, "hashes": hashes}
+
+    # -- Garbage Collection ---------------------------------------------------
+
+    def gc(self, keep_count: int = 30) -> Dict[str, int]:
+        """
+        Keep the newest keep_count manifests, then delete blobs that no kept
+        manifest references (reference counts rebuilt from the manifests).
+        """
+        manifests = self.manifests()
+        expired = manifests[:-keep_count] if keep_count > 0 else manifests
+        for path in expired:
+            remove_file(path)
+
+        refcounts: Dict[str, int] = {}
+        for path in manifests[len(expired):]:
+            for line in self.iter_manifest_lines(path):
+                refcounts[line["Blob"]] = refcounts.get(line["Blob"], 0) + 1
+
+        removed_blobs = 0
+        for blob_path in list(self.iter_blobs()):
+            name = os.path.basename(blob_path)
+            # Leftover temp files and unreferenced blobs both go
+            if name.startswith(TMP_PREFIX) or name.split(".", 1)[0] not in refcounts:
+                remove_file(blob_path)
+                removed_blobs += 1
+        return {"manifests": len(expired), "blobs": removed_blobs, "live_blobs": len(refcounts)}
+
+# -----------------------------------------------------------------------------
+# CLI Entry Point
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    from backup_data import backup_record, seed_items, write_json, write_markdown
+    from notion_mirror import NotionMirror
+    from seed_restore import seed_file_suffix, write_seed_file
+
+    parser = argparse.ArgumentParser(description="Inspect or export the deduplicated backup store")
+    parser.add_argument("--backup-dir", default="backups")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List manifests")
+    export = sub.add_parser("export", help="Materialize a manifest as JSON, Markdown or a seed file")
+    export.add_argument("manifest", nargs="?", help="Manifest file (default: latest)")
+    export.add_argument("--format", choices=["json", "md", "seed"], default="json")
+    export.add_argument("--output", help="Output path")
+    verify_parser = sub.add_parser("verify", help="Check a manifest is complete and restorable")
+    verify_parser.add_argument("manifest", nargs="?", help="Manifest file (default: latest)")
+    verify_parser.add_argument("--deep", action="store_true", help="Also decompress every blob and recheck its hashes")
+    verify_parser.add_argument("--live", action="store_true",
+                               help="Diff record hashes against the live database (via the synced local mirror)")
+    gc_parser = sub.add_parser("gc", help="Drop old manifests and unreferenced blobs")
+    gc_parser.add_argument("--keep", type=int, default=30)
+    args = parser.parse_args()
+
+    store = BackupStore(args.backup_dir)
+    if args.command == "list":
+        for path in store.manifests():
+            print(os.path.basename(path))
+    elif args.command == "gc":
+        stats = store.gc(args.keep)
+        print_success(f"清理完成：删除清单 {stats['manifests']} 个，Blob {stats['blobs']} 个，保留 Blob {stats['live_blobs']} 个")
+    elif args.command == "verify":
+        manifests = store.manifests()
+        manifest = args.manifest or (manifests[-1] if manifests else None)
+        if not manifest:
+            print_error("没有可校验的备份清单")
+        else:
+            report = store.verify(manifest, deep=args.deep)
+            for message in report["problems"]:
+                print_error(message)
+            if report["problems"]:
+                print_error(f"校验失败: {manifest}")
+            else:
+                print_success(f"校验通过: {manifest}（{report['records']} 条，总哈希 {report['total_hash'][:12]}）")
+
+            if args.live:
+                with NotionMirror() as mirror:
+                    mirror.ensure_fresh(force=True, check_deleted=True)
+                    live = ((r.page_id, record_hash(backup_record(r))) for r in mirror.iter_pages())
+                    diff = diff_hashes(report["hashes"], live)
+                print_info(
+                    f"与线上数据库对比：新增 {len(diff['missing'])}，已删除 {len(diff['extra'])}，"
+                    f"已变更 {len(diff['changed'])}"
+                )
+                for kind, label in (("missing", "备份后新增"), ("extra", "备份后删除"), ("changed", "备份后变更")):
+                    for page_id in diff[kind][:MAX_REPORTED_PROBLEMS]:
+                        print(f"  {label}: {page_id}")
+            if report["problems"]:
+                raise SystemExit(1)
+    else:
+        manifests = store.manifests()
+        manifest = args.manifest or (manifests[-1] if manifests else None)
+        if not manifest:
+            print_error("没有可导出的备份清单")
+        else:
+            stamp = os.path.basename(manifest).split(".", 1)[0].replace("manifest_", "")
+            default_names = {
+                "json": compressed_path(f"skills_{stamp}.json"),
+                "md": compressed_path(f"skills_{stamp}.md"),
+                "seed": f"data_seed_{stamp}{seed_file_suffix()}",
+            }
+            output = args.output or default_names[args.format]
+            records = store.iter_records(manifest)
+            with atomic_path(output) as tmp_path:
+                if args.format == "seed":
+                    write_seed_file(seed_items(records), tmp_path)
+                else:
+                    # Codec follows the output suffix (.gz / .zst / none)
+                    with open_text(tmp_path, "w") as f:
+                        if args.format == "json":
+                            write_json(records, f)
+                        else:
+                            write_markdown(records, f)
+            print_success(f"已导出: {output}")
+            print_info(f"来源清单: {manifest}")
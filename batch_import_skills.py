@@ -1,10 +1,9 @@
 from agent_notion import NotionAgent
-import time
 
 def main():
     print("Initializing Notion Agent...")
     try:
-        agent = NotionAgent()
+        agent = NotionAgent(persist_index=True)
     except Exception as e:
         print(f"Failed to initialize agent: {e}")
         return
@@ -44,19 +43,7 @@ def main():
 
     print(f"Starting batch import of {len(skills)} skills...")
     
-    for i, skill in enumerate(skills, 1):
-        print(f"\n[{i}/{len(skills)}] Processing: {skill['title']}")
-        try:
-            agent.save_to_notion(
-                title=skill['title'],
-                content=skill['content'],
-                tag=skill['tag'],
-                url=skill['url']
-            )
-            # Add a small delay to be nice to the API
-            time.sleep(1)
-        except Exception as e:
-            print(f"❌ Failed to save {skill['title']}: {e}")
+    agent.save_many(skills)
 
     print("\nBatch import completed!")
 
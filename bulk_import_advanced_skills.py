@@ -142,21 +142,12 @@ def build_items():
 
 
 def main():
-    agent = NotionAgent()
+    agent = NotionAgent(persist_index=True)
     items = build_items()
 
-    for idx, item in enumerate(items, 1):
-        print(f"[{idx}/{len(items)}] Saving: {item['title']}")
-        try:
-            agent.save_to_notion(
-                title=item["title"],
-                content=item["content"],
-                tag=item["tag"],
-                url=item["url"],
-                status="Active",
-            )
-        except Exception as e:
-            print(f"❌ Failed to save {item['title']}: {e}")
+    print(f"Saving {len(items)} items (Status=Active)...")
+    # One batched existence lookup, then concurrent creates/updates
+    agent.save_many([dict(item, status="Active") for item in items])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+import os
+import time
+import threading
+from typing import Dict, List, Set
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # distinct failing URLs that open a host
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "300"))  # seconds open before a half-open probe
+CIRCUIT_MAX_DEFERRALS = int(os.getenv("CIRCUIT_MAX_DEFERRALS", "7"))  # times a Source may be deferred before it counts as dead
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# -----------------------------------------------------------------------------
+# Per-host Circuit Breaker
+# -----------------------------------------------------------------------------
+
+class _HostCircuit:
+    __slots__ = ("state", "failing", "opened_at", "probing")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failing: Set[str] = set()  # URLs that timed out / 5xx'd since the host last answered
+        self.opened_at = 0.0
+        self.probing = False
+
+class CircuitBreaker:
+    """
+    Tracks transport failures (timeouts, 5xx) per upstream host, counted per
+    URL so one dead link's retries are a single failure. Once `threshold`
+    distinct URLs on a host have failed with no success in between, its
+    circuit opens and requests to it fail fast. Once `cooldown` has passed a single half-open probe is let
+    through: success closes the circuit, failure reopens it.
+    """
+    def __init__(self, threshold: int = CIRCUIT_FAILURE_THRESHOLD, cooldown: float = CIRCUIT_COOLDOWN):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostCircuit] = {}
+
+    def _circuit(self, url: str) -> _HostCircuit:
+        # Caller holds the lock
+        host = urlparse(url).netloc.lower()
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            circuit = self._hosts[host] = _HostCircuit()
+        return circuit
+
+    def blocked(self, url: str) -> bool:
+        """True while requests to `url` would be refused (read-only; never claims the probe)."""
+        with self._lock:
+            circuit = self._circuit(url)
+            if circuit.state == OPEN:
+                return time.monotonic() - circuit.opened_at < self.cooldown
+            return circuit.state == HALF_OPEN and circuit.probing
+
+    def allow(self, url: str) -> bool:
+        """Whether a request to `url` may be sent now (may claim the half-open probe)."""
+        with self._lock:
+            circuit = self._circuit(url)
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == OPEN and time.monotonic() - circuit.opened_at >= self.cooldown:
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                return True
+            return False
+
+    def record_success(self, url: str) -> None:
+        """The host answered (any non-5xx status): close its circuit."""
+        with self._lock:
+            circuit = self._circuit(url)
+            circuit.state = CLOSED
+            circuit.failing.clear()
+            circuit.probing = False
+
+    def record_failure(self, url: str) -> bool:
+        """Count a timeout / 5xx. Returns True if the host's circuit is now open."""
+        with self._lock:
+            circuit = self._circuit(url)
+            circuit.failing.add(url)
+            if circuit.state == HALF_OPEN or len(circuit.failing) >= self.threshold:
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+                circuit.probing = False
+            return circuit.state == OPEN
+
+    def host_failing(self, url: str) -> bool:
+        """
+        True if the host's circuit is not closed, or other URLs on it have
+        failed since its last success. A failure of `url` then says nothing
+        about the page itself, even before the threshold opens the circuit;
+        a URL failing alone on a healthy host is just a dead link.
+        """
+        with self._lock:
+            circuit = self._circuit(url)
+            return circuit.state != CLOSED or bool(circuit.failing - {url})
+
+    def open_hosts(self) -> List[str]:
+        """Hosts whose circuit is not closed."""
+        with self._lock:
+            return sorted(host for host, c in self._hosts.items() if c.state != CLOSED)
@@ -0,0 +1,100 @@
+import io
+import os
+import sys
+import gzip
+import shutil
+import argparse
+from typing import IO, List
+
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+# auto (zstd if installed, else gzip) | gzip | zstd | none
+BACKUP_COMPRESSION = os.getenv("BACKUP_COMPRESSION", "auto").strip().lower()
+
+ZSTD_AVAILABLE = zstandard is not None
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+
+SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+
+def default_method() -> str:
+    """Codec for new backup files, from BACKUP_COMPRESSION (zstd falls back to gzip if not installed)."""
+    if BACKUP_COMPRESSION in ("gzip", "none"):
+        return BACKUP_COMPRESSION
+    return "zstd" if ZSTD_AVAILABLE else "gzip"
+
+def compressed_path(path: str, method: str = None) -> str:
+    """`path` plus the suffix of the configured (or given) codec, e.g. skills.json -> skills.json.gz."""
+    return path + SUFFIXES[method or default_method()]
+
+def other_variants(path: str) -> List[str]:
+    """Existing siblings of a compressed_path() result written with another codec."""
+    base = path
+    for suffix in SUFFIXES.values():
+        if suffix and path.endswith(suffix):
+            base = path[: -len(suffix)]
+    return [base + s for s in SUFFIXES.values() if base + s != path and os.path.exists(base + s)]
+
+def method_for_path(path: str) -> str:
+    if path.endswith(".zst"):
+        return "zstd"
+    if path.endswith(".gz"):
+        return "gzip"
+    return "none"
+
+def open_text(path: str, mode: str = "r") -> IO[str]:
+    """
+    Open a (possibly compressed) UTF-8 text file for streaming, picking the
+    codec from the suffix (.gz / .zst). mode is "r" or "w".
+    """
+    method = method_for_path(path)
+    if method == "gzip":
+        # mtime=0 keeps output byte-identical for identical data
+        if mode == "w":
+            raw = gzip.GzipFile(path, "wb", compresslevel=GZIP_LEVEL, mtime=0)
+            return io.TextIOWrapper(raw, encoding="utf-8")
+        return gzip.open(path, "rt", encoding="utf-8")
+    if method == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; install the 'zstandard' package to use it")
+        if mode == "w":
+            return zstandard.open(path, "w", cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL), encoding="utf-8")
+        return zstandard.open(path, "r", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+# -----------------------------------------------------------------------------
+# CLI Entry Point
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read (decompress on the fly) or convert backup files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cat = sub.add_parser("cat", help="Stream decompressed file contents to stdout")
+    cat.add_argument("files", nargs="+")
+    convert = sub.add_parser("convert", help="Re-encode a file; codecs follow the suffixes (.gz / .zst / none)")
+    convert.add_argument("source")
+    convert.add_argument("target")
+    args = parser.parse_args()
+
+    if args.command == "cat":
+        for path in args.files:
+            with open_text(path, "r") as f:
+                shutil.copyfileobj(f, sys.stdout)
+    else:
+        with open_text(args.source, "r") as src, open_text(args.target, "w") as dst:
+            shutil.copyfileobj(src, dst)
@@ -1,5 +1,4 @@
 from agent_notion import NotionAgent
-import time
 
 
 def build_items():
@@ -138,22 +137,10 @@ def build_items():
 
 
 def main():
-    agent = NotionAgent()
+    agent = NotionAgent(persist_index=True)
     items = build_items()
     print(f"准备入库核心资产：{len(items)} 条，使用去重逻辑，Status=Active")
-    for idx, item in enumerate(items, 1):
-        print(f"[{idx}/{len(items)}] Saving: {item['title']}")
-        try:
-            agent.save_to_notion(
-                title=item["title"],
-                content=item["content"],
-                tag=item["tag"],
-                url=item["url"],
-                status="Active",
-            )
-        except Exception as e:
-            print(f"❌ Failed to save {item['title']}: {e}")
-        time.sleep(0.5)
+    agent.save_many([dict(item, status="Active") for item in items])
     print("核心资产入库流程结束")
 
 
@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+from state_store import state_path, load_json, save_json_atomic
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+FAILURE_CACHE_PATH = state_path("upstream_failures.json")
+
+# Failure classes reported by fetch_source
+NOT_FOUND = "not_found"  # 404 / 410: the page is gone
+CLIENT_ERROR = "client_error"  # other 4xx
+SERVER_ERROR = "server_error"  # 5xx
+TIMEOUT = "timeout"  # timeouts and connection errors
+EMPTY = "empty"  # 200 with an empty body
+
+# First recheck delay per class; doubles with every further failure
+FAILURE_BASE_HOURS = {
+    NOT_FOUND: 24,
+    CLIENT_ERROR: 24,
+    EMPTY: 24,
+    SERVER_ERROR: 4,
+    TIMEOUT: 4,
+}
+FAILURE_MAX_BACKOFF_DAYS = float(os.getenv("FAILURE_MAX_BACKOFF_DAYS", "30"))
+RECHECK_SLACK = 3600  # seconds; a daily cycle starting slightly early still probes
+
+# -----------------------------------------------------------------------------
+# Negative Cache
+# -----------------------------------------------------------------------------
+
+class FailureCache:
+    """
+    Persistent per-URL failure records. A failing Source is only probed
+    again once its recheck time has passed; the interval doubles with each
+    consecutive failure (per failure class) up to FAILURE_MAX_BACKOFF_DAYS.
+    """
+    def __init__(self, path: str = FAILURE_CACHE_PATH):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = load_json(path, {}) or {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(url)
+            return dict(entry) if entry else None
+
+    def due(self, url: str, now: Optional[float] = None) -> bool:
+        """True if `url` has no failure record or its next probe is due."""
+        entry = self.get(url)
+        if not entry:
+            return True
+        return (now or time.time()) >= entry["next_check"] - RECHECK_SLACK
+
+    def record(self, url: str, failure: str, deferred: bool = False) -> Dict[str, Any]:
+        """
+        Count another failure of `url` and schedule its next probe. deferred
+        marks a failure blamed on the host being down rather than on the page
+        (see deferrals).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(url) or {"failures": 0, "first_failed": now}
+            entry["failures"] += 1
+            entry["class"] = failure
+            entry["last_failed"] = now
+            if deferred:
+                entry["deferrals"] = entry.get("deferrals", 0) + 1
+            base = FAILURE_BASE_HOURS.get(failure, 24) * 3600
+            interval = min(base * 2 ** (entry["failures"] - 1), FAILURE_MAX_BACKOFF_DAYS * 86400)
+            entry["next_check"] = now + interval
+            self._entries[url] = entry
+            self._dirty = True
+            return dict(entry)
+
+    def deferrals(self, url: str) -> int:
+        """How many failures of `url` were deferred as host outages since it last answered."""
+        entry = self.get(url)
+        return entry.get("deferrals", 0) if entry else 0
+
+    def clear(self, url: str) -> None:
+        """Forget the failures of a URL that answered again."""
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._dirty = True
+
+    def prune(self, max_age_days: float = FAILURE_MAX_BACKOFF_DAYS * 2) -> None:
+        """Drop records not touched for a long time (e.g. Sources since replaced)."""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            stale = [url for url, entry in self._entries.items() if entry.get("last_failed", 0) < cutoff]
+            for url in stale:
+                del self._entries[url]
+            self._dirty = self._dirty or bool(stale)
+
+    def save(self) -> None:
+        """Flush to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            save_json_atomic(self.path, self._entries)
+            self._dirty = False
@@ -0,0 +1,204 @@
+import os
+import asyncio
+import threading
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+from notion_client import AsyncClient, Client
+
+from rate_limiter import (
+    NOTION_MAX_ATTEMPTS,
+    TokenBucket,
+    is_idempotent,
+    notion_limiter,
+    should_retry,
+    wait_before_retry,
+    wait_before_retry_async,
+)
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+NOTION_API_BASE = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))  # keep-alive connections per host
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))  # connection-level retries only
+NOTION_ASYNC_CONCURRENCY = int(os.getenv("NOTION_ASYNC_CONCURRENCY", "8"))  # in-flight requests per async client
+
+# Default timeouts (seconds) per destination
+NOTION_TIMEOUT = 30
+UPSTREAM_TIMEOUT = 15
+TELEGRAM_TIMEOUT = 10
+
+# -----------------------------------------------------------------------------
+# Pooled Sessions
+# -----------------------------------------------------------------------------
+
+class PooledSession(requests.Session):
+    """requests.Session with a default timeout applied to every call."""
+    def __init__(self, timeout: float):
+        super().__init__()
+        self.default_timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+class NotionSession(PooledSession):
+    """
+    PooledSession that shares the process-wide Notion rate limit and retries
+    429s (and 5xx for idempotent requests, see rate_limiter.is_idempotent).
+    """
+    def request(self, method, url, **kwargs):
+        idempotent = is_idempotent(method, url)
+        attempt = 0
+        while True:
+            notion_limiter.acquire()
+            resp = super().request(method, url, **kwargs)
+            if not should_retry(resp.status_code, idempotent) or attempt >= NOTION_MAX_ATTEMPTS - 1:
+                return resp
+            wait_before_retry(resp.status_code, resp.headers.get("Retry-After"), attempt)
+            attempt += 1
+
+class NotionTransport(httpx.HTTPTransport):
+    """httpx transport applying the same limiter/retry policy to notion_client.Client."""
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = is_idempotent(request.method, request.url)
+        attempt = 0
+        while True:
+            notion_limiter.acquire()
+            resp = super().handle_request(request)
+            if not should_retry(resp.status_code, idempotent) or attempt >= NOTION_MAX_ATTEMPTS - 1:
+                return resp
+            retry_after = resp.headers.get("Retry-After")
+            resp.close()
+            wait_before_retry(resp.status_code, retry_after, attempt)
+            attempt += 1
+
+class AsyncNotionTransport(httpx.AsyncHTTPTransport):
+    """
+    Async counterpart of NotionTransport. Caps in-flight requests with a
+    semaphore and draws tokens from `limiter` (the shared Notion bucket by default).
+    Create it inside the event loop that will use it.
+    """
+    def __init__(self, concurrency: int = NOTION_ASYNC_CONCURRENCY, limiter: Optional[TokenBucket] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter or notion_limiter
+        self._slots = asyncio.Semaphore(max(concurrency, 1))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = is_idempotent(request.method, request.url)
+        attempt = 0
+        while True:
+            await self.limiter.acquire_async()
+            async with self._slots:
+                resp = await super().handle_async_request(request)
+                if not should_retry(resp.status_code, idempotent) or attempt >= NOTION_MAX_ATTEMPTS - 1:
+                    return resp
+                retry_after = resp.headers.get("Retry-After")
+                await resp.aclose()
+            await wait_before_retry_async(resp.status_code, retry_after, attempt, self.limiter)
+            attempt += 1
+
+_sessions: Dict[str, PooledSession] = {}
+_sessions_lock = threading.Lock()
+
+def _build_session(timeout: float, headers: Optional[Dict[str, str]] = None, session_cls: type = PooledSession) -> PooledSession:
+    session = session_cls(timeout)
+    # Only retry failures that happen before the request reaches the server,
+    # so non-idempotent writes are never sent twice.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=0,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=None,
+        # Status handling (429 Retry-After, 5xx) is left to the caller
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def _get_session(name: str, timeout: float, headers: Optional[Dict[str, str]] = None, session_cls: type = PooledSession) -> PooledSession:
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _build_session(timeout, headers, session_cls)
+            _sessions[name] = session
+        return session
+
+def notion_session() -> NotionSession:
+    """Shared, rate-limited session for api.notion.com with auth headers baked in."""
+    return _get_session(
+        "notion",
+        NOTION_TIMEOUT,
+        {
+            "Authorization": f"Bearer {os.getenv('NOTION_TOKEN')}",
+            "Notion-Version": NOTION_VERSION,
+            "Content-Type": "application/json",
+        },
+        NotionSession,
+    )
+
+def build_notion_client(auth: Optional[str] = None) -> Client:
+    """notion_client.Client whose requests go through the shared Notion limiter."""
+    transport = NotionTransport(retries=HTTP_RETRIES, limits=httpx.Limits(max_connections=HTTP_POOL_SIZE))
+    return Client(
+        auth=auth or os.getenv("NOTION_TOKEN"),
+        client=httpx.Client(transport=transport),
+        timeout_ms=NOTION_TIMEOUT * 1000,
+    )
+
+def build_async_notion_client(
+    auth: Optional[str] = None,
+    concurrency: int = NOTION_ASYNC_CONCURRENCY,
+    limiter: Optional[TokenBucket] = None,
+) -> AsyncClient:
+    """notion_client.AsyncClient with its own concurrency ceiling; call from a running event loop."""
+    transport = AsyncNotionTransport(
+        concurrency=concurrency,
+        limiter=limiter,
+        retries=HTTP_RETRIES,
+        limits=httpx.Limits(max_connections=max(concurrency, 1)),
+    )
+    return AsyncClient(
+        auth=auth or os.getenv("NOTION_TOKEN"),
+        client=httpx.AsyncClient(transport=transport),
+        timeout_ms=NOTION_TIMEOUT * 1000,
+    )
+
+def upstream_session() -> PooledSession:
+    """Shared session for fetching Source URLs (GitHub, cursor.directory, ...)."""
+    return _get_session("upstream", UPSTREAM_TIMEOUT)
+
+def telegram_session() -> PooledSession:
+    """Shared session for the Telegram Bot API."""
+    return _get_session("telegram", TELEGRAM_TIMEOUT)
+
+def notion_url(path: str) -> str:
+    """Build an absolute Notion API URL from a path like 'databases/<id>/query'."""
+    return f"{NOTION_API_BASE}/{path.lstrip('/')}"
+
+def close_sessions() -> None:
+    """Close all pooled sessions (e.g. before process exit)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
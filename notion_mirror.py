@@ -0,0 +1,278 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from agent_notion import (
+    NOTION_DATABASE_ID,
+    PageRecord,
+    iter_database_batches,
+    parse_page,
+    print_info,
+    print_success,
+    print_error,
+)
+from state_store import WATERMARK_OVERLAP, iso, parse_iso, state_path, utc_now
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+MIRROR_PATH = os.getenv("NOTION_MIRROR_PATH", state_path("notion_mirror.sqlite3"))
+MIRROR_MAX_AGE = int(os.getenv("NOTION_MIRROR_MAX_AGE", "300"))  # seconds before readers trigger a sync
+MIRROR_FULL_SYNC_DAYS = float(os.getenv("NOTION_MIRROR_FULL_SYNC_DAYS", "7"))  # full scans also drop deleted pages
+TITLE_PROPERTY_ID = "title"  # Notion's fixed ID of the title property; requested alone for ID-only scans
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    type TEXT,
+    status TEXT,
+    source TEXT,
+    content TEXT NOT NULL DEFAULT '',
+    content_hash TEXT,
+    created_time TEXT,
+    last_edited_time TEXT,
+    url TEXT,
+    properties TEXT,
+    synced_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_title ON pages(title);
+CREATE INDEX IF NOT EXISTS idx_pages_status ON pages(status);
+CREATE INDEX IF NOT EXISTS idx_pages_edited ON pages(last_edited_time);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# PageRecord fields stored as columns
+RECORD_COLUMNS = (
+    "page_id", "title", "type", "status", "source", "content", "content_hash",
+    "created_time", "last_edited_time", "url",
+)
+COLUMNS = RECORD_COLUMNS + ("properties", "synced_at")
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+
+def row_from_page(page: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a raw Notion page into a mirror row."""
+    record = parse_page(page)
+    row = {name: getattr(record, name) for name in RECORD_COLUMNS}
+    row["properties"] = json.dumps(page.get("properties", {}), ensure_ascii=False)
+    row["synced_at"] = time.time()
+    return row
+
+def record_from_row(row: sqlite3.Row) -> PageRecord:
+    """Rebuild a PageRecord from a mirror row."""
+    return PageRecord(**{name: row[name] for name in RECORD_COLUMNS})
+
+# -----------------------------------------------------------------------------
+# Mirror
+# -----------------------------------------------------------------------------
+
+class NotionMirror:
+    """
+    Local SQLite replica of the Notion database, shared by every tool.
+    Syncs incrementally by last_edited_time; full syncs also drop deleted pages.
+    """
+    def __init__(self, path: str = MIRROR_PATH, database_id: Optional[str] = None):
+        self.path = path
+        self.database_id = database_id or NOTION_DATABASE_ID
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        if self._get_meta("database_id") not in (None, self.database_id):
+            # Pointed at a different database: start over
+            print_info("镜像对应的数据库已变更，重建本地镜像")
+            self.conn.execute("DELETE FROM pages")
+            self.conn.execute("DELETE FROM meta")
+        self._set_meta("database_id", self.database_id)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "NotionMirror":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- Meta -----------------------------------------------------------------
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    def last_synced_at(self) -> float:
+        return float(self._get_meta("synced_at") or 0)
+
+    def last_pruned_at(self) -> float:
+        """When archived/deleted pages were last dropped (full sync or prune_deleted)."""
+        return float(self._get_meta("pruned_at") or 0)
+
+    # -- Sync -----------------------------------------------------------------
+
+    def upsert_pages(self, pages: List[Dict[str, Any]]) -> int:
+        """Write raw Notion pages into the mirror (also usable by callers that already queried)."""
+        rows = [row_from_page(p) for p in pages if p.get("id")]
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS if c != "page_id")
+        self.conn.executemany(
+            f"INSERT INTO pages ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(page_id) DO UPDATE SET {updates}",
+            [tuple(r[c] for c in COLUMNS) for r in rows],
+        )
+        return len(rows)
+
+    def sync(self, full: bool = False) -> Dict[str, int]:
+        """Pull changes from Notion. Returns {'upserted': n, 'removed': m}."""
+        started = utc_now()
+        watermark = parse_iso(self._get_meta("watermark"))
+        last_full = float(self._get_meta("last_full") or 0)
+        if not watermark or time.time() - last_full > MIRROR_FULL_SYNC_DAYS * 86400:
+            full = True
+
+        query_filter = None
+        if not full:
+            since = watermark - datetime.timedelta(seconds=WATERMARK_OVERLAP)
+            query_filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": iso(since)}}
+
+        print_info(f"同步本地镜像 ({'全量' if full else '增量'})...")
+        seen: set = set()
+        upserted = 0
+        for results in iter_database_batches(self.database_id, query_filter):
+            upserted += self.upsert_pages(results)
+            seen.update(p.get("id") for p in results)
+            self.conn.commit()
+
+        removed = 0
+        if full:
+            # Anything not returned by a full scan was archived or deleted in Notion
+            existing = [r["page_id"] for r in self.conn.execute("SELECT page_id FROM pages")]
+            stale = [pid for pid in existing if pid not in seen]
+            self.conn.executemany("DELETE FROM pages WHERE page_id = ?", [(pid,) for pid in stale])
+            removed = len(stale)
+            self._set_meta("last_full", str(time.time()))
+            self._set_meta("pruned_at", str(started.timestamp()))
+
+        self._set_meta("watermark", iso(started))
+        self._set_meta("synced_at", str(time.time()))
+        self.conn.commit()
+        print_success(f"本地镜像同步完成：更新 {upserted} 条，移除 {removed} 条")
+        return {"upserted": upserted, "removed": removed, "full": full}
+
+    def prune_deleted(self) -> int:
+        """
+        Drop pages archived or deleted in Notion since the last full sync.
+        Incremental syncs never see those (archived pages drop out of the
+        query), so this runs an ID-only scan: only the title property is
+        requested, which keeps each batch small. Returns the number removed.
+        """
+        started = time.time()
+        live: set = set()
+        for results in iter_database_batches(self.database_id, filter_properties=[TITLE_PROPERTY_ID]):
+            live.update(p.get("id") for p in results)
+        stale = [pid for pid in self.page_ids() if pid not in live]
+        self.conn.executemany("DELETE FROM pages WHERE page_id = ?", [(pid,) for pid in stale])
+        self._set_meta("pruned_at", str(started))
+        self.conn.commit()
+        if stale:
+            print_info(f"本地镜像移除已归档/删除的页面 {len(stale)} 条")
+        return len(stale)
+
+    def ensure_fresh(self, max_age: float = MIRROR_MAX_AGE, force: bool = False, full: bool = False,
+                     check_deleted: bool = False) -> None:
+        """
+        Sync before reading if the mirror is older than max_age (or when forced).
+        check_deleted: also drop pages archived/deleted in Notion (ID-only
+        scan) unless that was done, or a full sync ran, within max_age;
+        needed by readers that must not see them.
+        """
+        if force or full or time.time() - self.last_synced_at() > max_age:
+            self.sync(full=full)
+        if check_deleted and time.time() - self.last_pruned_at() > max_age:
+            self.prune_deleted()
+
+    # -- Read -----------------------------------------------------------------
+
+    def iter_pages(
+        self,
+        status: Optional[str] = None,
+        order_by: str = "last_edited_time DESC",
+        edited_since: Optional[str] = None,
+    ) -> Iterator[PageRecord]:
+        """Stream mirrored pages as PageRecords, optionally filtered by Status / last_edited_time >= edited_since."""
+        sql = f"SELECT {', '.join(RECORD_COLUMNS)} FROM pages"
+        clauses: List[str] = []
+        params: tuple = ()
+        if status:
+            clauses.append("status = ?")
+            params += (status,)
+        if edited_since:
+            clauses.append("last_edited_time >= ?")
+            params += (edited_since,)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by}"
+        for row in self.conn.execute(sql, params):
+            yield record_from_row(row)
+
+    def duplicate_groups(self) -> Iterator[List[PageRecord]]:
+        """Yield lists of pages sharing the same title (only groups of 2+)."""
+        titles = [r["title"] for r in self.conn.execute(
+            "SELECT title FROM pages WHERE title != '' GROUP BY title HAVING COUNT(*) > 1"
+        )]
+        for title in titles:
+            yield [record_from_row(r) for r in self.conn.execute(
+                f"SELECT {', '.join(RECORD_COLUMNS)} FROM pages WHERE title = ?", (title,)
+            )]
+
+    def page_ids(self) -> Iterator[str]:
+        for row in self.conn.execute("SELECT page_id FROM pages"):
+            yield row["page_id"]
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status:
+            return self.conn.execute("SELECT COUNT(*) FROM pages WHERE status = ?", (status,)).fetchone()[0]
+        return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def remove(self, page_id: str) -> None:
+        """Drop a page locally after archiving it in Notion."""
+        self.conn.execute("DELETE FROM pages WHERE page_id = ?", (page_id,))
+        self.conn.commit()
+
+# -----------------------------------------------------------------------------
+# CLI Entry Point
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync the local SQLite mirror of the Notion database")
+    parser.add_argument("--full", action="store_true", help="Full rescan (also removes deleted pages)")
+    args = parser.parse_args()
+
+    if not NOTION_DATABASE_ID:
+        print_error("Missing NOTION_DATABASE_ID in environment.")
+    else:
+        with NotionMirror() as mirror:
+            mirror.sync(full=args.full)
+            print_info(f"镜像共 {mirror.count()} 条 ({mirror.path})")
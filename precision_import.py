@@ -134,7 +134,7 @@ If a task fails in `gather`, it can cancel others depending on `return_exception
 # -----------------------------------------------------------------------------
 
 def main():
-    agent = NotionAgent()
+    agent = NotionAgent(persist_index=True)
     
     tasks = [
         {
@@ -158,18 +158,7 @@ def main():
     ]
     
     print("🚀 Starting Precision Import...")
-    for task in tasks:
-        print(f"\nProcessing: {task['title']}")
-        try:
-            agent.save_to_notion(
-                title=task["title"],
-                content=task["content"],
-                tag=task["tag"],
-                url=task["url"],
-                status="Active"
-            )
-        except Exception as e:
-            print(f"❌ Error processing {task['title']}: {e}")
+    agent.save_many([dict(task, status="Active") for task in tasks])
     print("\n✨ All tasks processed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+import os
+import time
+import asyncio
+import random
+import threading
+import email.utils
+from typing import Optional
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+# Notion allows ~3 requests/second per integration (bursts are tolerated).
+NOTION_RATE_LIMIT = float(os.getenv("NOTION_RATE_LIMIT", "3"))
+NOTION_BURST = int(os.getenv("NOTION_BURST", "3"))
+NOTION_MAX_ATTEMPTS = int(os.getenv("NOTION_MAX_ATTEMPTS", "5"))
+
+# DuckDuckGo search (used by dead-link healing) throttles bursts of queries.
+SEARCH_RATE_LIMIT = float(os.getenv("SEARCH_RATE_LIMIT", "0.2"))  # queries/second
+
+# Methods safe to send twice. POST creates (pages, comments) are not, and
+# neither is appending block children (PATCH .../children).
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "PATCH", "DELETE"}
+READ_ONLY_POSTS = ("/query", "/search")
+
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_CAP = 30.0  # seconds
+
+# -----------------------------------------------------------------------------
+# Token Bucket
+# -----------------------------------------------------------------------------
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every caller of one API."""
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def _wait_locked(self, now: float) -> float:
+        pause = max(0.0, self._paused_until - now)
+        if self._tokens >= 1:
+            return pause
+        return max(pause, (1 - self._tokens) / self.rate)
+
+    def current_wait(self) -> float:
+        """Seconds a caller would wait right now before being allowed to send."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return self._wait_locked(now)
+
+    def _try_take(self) -> float:
+        """Take a token if one is free (returns 0), else return the wait needed."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._wait_locked(now)
+            if wait <= 0:
+                self._tokens -= 1
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the time spent waiting."""
+        waited = 0.0
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self) -> float:
+        """acquire() for coroutines: waits without blocking the event loop."""
+        waited = 0.0
+        while True:
+            wait = self._try_take()
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def pause_for(self, seconds: float) -> None:
+        """Hold back every caller for `seconds` (e.g. after a 429) and drain the burst."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+notion_limiter = TokenBucket(NOTION_RATE_LIMIT, NOTION_BURST)
+search_limiter = TokenBucket(SEARCH_RATE_LIMIT, 1)
+
+# -----------------------------------------------------------------------------
+# Retry Helpers
+# -----------------------------------------------------------------------------
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Exponential backoff with full jitter for the given 0-based attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def is_idempotent(method: str, url: str) -> bool:
+    """Whether a Notion request can be resent without risk of applying it twice."""
+    method = method.upper()
+    path = urlparse(str(url)).path.rstrip("/")
+    if method == "POST":
+        return path.endswith(READ_ONLY_POSTS)
+    return method in IDEMPOTENT_METHODS and not (method == "PATCH" and path.endswith("/children"))
+
+def should_retry(status_code: int, idempotent: bool = True) -> bool:
+    """
+    Statuses worth retrying against the Notion API. A 429 was rejected before
+    any work was done; a 5xx may arrive after the write was applied, so it is
+    only retried for idempotent requests.
+    """
+    return status_code == 429 or (idempotent and status_code >= 500)
+
+def _retry_delay(status_code: int, retry_after: Optional[str], attempt: int, bucket: TokenBucket) -> float:
+    """Seconds the caller itself should sleep before retrying (0 after a 429)."""
+    if status_code == 429:
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = backoff_delay(attempt)
+        # Everyone shares the integration quota, so the whole bucket pauses;
+        # the retry itself waits in bucket.acquire().
+        bucket.pause_for(delay)
+        return 0.0
+    return backoff_delay(attempt)
+
+def wait_before_retry(status_code: int, retry_after: Optional[str], attempt: int,
+                      bucket: Optional[TokenBucket] = None) -> None:
+    """Back off before retrying a throttled (429) or failed (5xx) Notion call."""
+    delay = _retry_delay(status_code, retry_after, attempt, bucket or notion_limiter)
+    if delay:
+        time.sleep(delay)
+
+async def wait_before_retry_async(status_code: int, retry_after: Optional[str], attempt: int,
+                                  bucket: Optional[TokenBucket] = None) -> None:
+    """wait_before_retry() for coroutines."""
+    delay = _retry_delay(status_code, retry_after, attempt, bucket or notion_limiter)
+    if delay:
+        await asyncio.sleep(delay)
@@ -1,86 +1,68 @@
-import os
-import requests
-from collections import defaultdict
+import argparse
 from dateutil import parser
 from dotenv import load_dotenv
-from agent_notion import NOTION_TOKEN, NOTION_DATABASE_ID, print_success, print_error, print_info, validate_env
+from http_transport import notion_session, notion_url
+from notion_mirror import NotionMirror
+from agent_notion import NOTION_DATABASE_ID, invalidate_persisted_index, print_success, print_error, print_info, validate_env
 
-def get_property_text(page, prop_name):
-    """Helper to extract plain text from various property types."""
-    props = page.get("properties", {})
-    prop = props.get(prop_name)
-    if not prop:
-        return ""
-    
-    p_type = prop.get("type")
-    if p_type == "title":
-        items = prop.get("title", [])
-        return items[0].get("plain_text", "") if items else ""
-    elif p_type == "rich_text":
-        items = prop.get("rich_text", [])
-        return items[0].get("plain_text", "") if items else ""
-    elif p_type == "url":
-        return prop.get("url") or ""
-    
-    return ""
+def page_archived(session, page_id):
+    """True/False from a live GET of the page; None if it could not be read."""
+    try:
+        resp = session.get(notion_url(f"pages/{page_id}"))
+    except Exception as e:
+        print_error(f"读取页面失败 {page_id}: {e}")
+        return None
+    if resp.status_code == 404:
+        return True
+    if resp.status_code != 200:
+        print_error(f"读取页面失败 {page_id}: {resp.status_code}")
+        return None
+    data = resp.json()
+    return bool(data.get("archived") or data.get("in_trash"))
 
 def main():
+    arg_parser = argparse.ArgumentParser(description="Archive duplicate pages (same Name) in the Notion database")
+    arg_parser.add_argument("--fresh", action="store_true", help="Full mirror rescan before deduplicating")
+    args = arg_parser.parse_args()
+
     validate_env()
     load_dotenv()
     
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
+    session = notion_session()
 
     print_info(f"正在连接数据库 {NOTION_DATABASE_ID}...")
     print_info("开始扫描数据库进行去重检查...")
 
-    all_pages = []
-    start_cursor = None
-    query_url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
-    
-    # 1. Fetch All Pages
-    while True:
-        try:
-            payload = {"page_size": 100}
-            if start_cursor:
-                payload["start_cursor"] = start_cursor
-
-            resp = requests.post(query_url, headers=headers, json=payload, timeout=30)
-            if resp.status_code != 200:
-                print_error(f"查询失败: {resp.status_code} {resp.text}")
-                break
-                
-            data = resp.json()
-            results = data.get("results", [])
-            all_pages.extend(results)
-            
-            print_info(f"已加载 {len(all_pages)} 条数据...")
+    # 1. Sync the local mirror (incremental unless --fresh, archived pages dropped)
+    mirror = NotionMirror()
+    try:
+        mirror.ensure_fresh(force=True, full=args.fresh, check_deleted=True)
+    except Exception as e:
+        print_error(f"Fetch error: {e}")
+        mirror.close()
+        return
+    print_info(f"已加载 {mirror.count()} 条数据...")
 
-            if not data.get("has_more"):
-                break
-            start_cursor = data.get("next_cursor")
-            
-        except Exception as e:
-            print_error(f"Fetch error: {e}")
-            break
-            
-    # 2. Group by Name
-    groups = defaultdict(list)
-    for page in all_pages:
-        title = get_property_text(page, "Name")
-        if title:
-            groups[title].append(page)
-            
-    # 3. Analyze Duplicates
+    # 2. Analyze Duplicates (grouped by Name in the mirror)
     duplicates_found = 0
     removed_count = 0
     
     print_info("开始分析重复项...")
     
-    for title, pages in groups.items():
+    for pages in list(mirror.duplicate_groups()):
+        title = pages[0].title
+        # The mirror may lag Notion: confirm every page is still live before
+        # choosing a winner, so an archived copy never wins over the live one
+        states = [(p, page_archived(session, p.page_id)) for p in pages]
+        if any(state is None for _, state in states):
+            print_error(f"无法确认 [{title}] 的页面状态，跳过该组")
+            continue
+        for p, state in states:
+            if state:
+                print_info(f"跳过已归档页面: [{title}] ID={p.page_id}")
+                mirror.remove(p.page_id)
+        pages = [p for p, state in states if not state]
+
         if len(pages) > 1:
             duplicates_found += 1
             print_info(f"发现重复: [{title}] - 共 {len(pages)} 条")
@@ -89,8 +71,8 @@ def main():
             # We want to keep the one with Content, and if both have content, the oldest created one.
             scored_pages = []
             for p in pages:
-                content = get_property_text(p, "Content")
-                created_time = parser.parse(p.get("created_time"))
+                content = p.content
+                created_time = parser.parse(p.created_time)
                 score = 0
                 if content and len(content) > 10:
                     score += 100
@@ -107,25 +89,32 @@ def main():
             winner = scored_pages[0][1]
             losers = [x[1] for x in scored_pages[1:]]
             
-            print_success(f"  保留: ID={winner['id']} (Created: {winner['created_time']})")
+            print_success(f"  保留: ID={winner.page_id} (Created: {winner.created_time})")
             
-            # 4. Delete (Archive) Losers
+            # 3. Delete (Archive) Losers
             for loser in losers:
-                loser_id = loser['id']
-                print_info(f"  🗑️ 删除: ID={loser_id} (Created: {loser['created_time']})")
+                loser_id = loser.page_id
+                print_info(f"  🗑️ 删除: ID={loser_id} (Created: {loser.created_time})")
                 
                 try:
-                    del_url = f"https://api.notion.com/v1/pages/{loser_id}"
+                    del_url = notion_url(f"pages/{loser_id}")
                     del_payload = {"archived": True}
-                    del_resp = requests.patch(del_url, headers=headers, json=del_payload, timeout=10)
+                    del_resp = session.patch(del_url, json=del_payload)
                     
                     if del_resp.status_code == 200:
                         removed_count += 1
+                        mirror.remove(loser_id)
                     else:
                         print_error(f"  删除失败: {del_resp.status_code}")
                 except Exception as e:
                     print_error(f"  删除异常: {e}")
 
+    mirror.close()
+
+    if removed_count:
+        # Archived pages may still be referenced by the persisted title index
+        invalidate_persisted_index()
+
     if duplicates_found == 0:
         print_info("🎉 没有发现任何重复条目！")
     else:
@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from duckduckgo_search import DDGS
+from duckduckgo_search.exceptions import RatelimitException
+
+from rate_limiter import search_limiter
+from state_store import state_path, load_json, save_json_atomic
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+SEARCH_CACHE_PATH = state_path("search_cache.json")
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "168"))
+SEARCH_RATELIMIT_PAUSE = 60  # seconds all queries wait after DDGS reports a rate limit
+
+# -----------------------------------------------------------------------------
+# Search Cache
+# -----------------------------------------------------------------------------
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+class SearchCache:
+    """
+    Persistent DDGS text-search results per query, valid for
+    SEARCH_CACHE_TTL_HOURS. Misses go through the shared search_limiter, and
+    identical queries issued concurrently share a single request.
+    """
+    def __init__(self, path: str = SEARCH_CACHE_PATH, ttl_hours: float = SEARCH_CACHE_TTL_HOURS):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self._entries: Dict[str, Dict[str, Any]] = load_json(path, {}) or {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = self.misses = 0
+
+    def _lookup(self, key: str, max_results: int) -> Optional[List[Dict[str, str]]]:
+        # Caller holds the lock
+        entry = self._entries.get(key)
+        if not entry or time.time() - entry["fetched_at"] > self.ttl or entry["max_results"] < max_results:
+            return None
+        return entry["results"][:max_results]
+
+    def text(self, query: str, max_results: int = 10) -> List[Dict[str, str]]:
+        """Search results ({"href", "title"}) for `query`, from cache when fresh."""
+        key = normalize_query(query)
+        with self._lock:
+            cached = self._lookup(key, max_results)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()[:max_results]
+
+        try:
+            results = self._search(query, max_results)
+        except BaseException as e:
+            # Failures are not cached; waiting duplicates see the same error
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._entries[key] = {"fetched_at": time.time(), "max_results": max_results, "results": results}
+            self._dirty = True
+            self._inflight.pop(key, None)
+        future.set_result(results)
+        return results
+
+    def _search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+        search_limiter.acquire()
+        try:
+            raw = DDGS().text(query, max_results=max_results) or []
+        except RatelimitException:
+            search_limiter.pause_for(SEARCH_RATELIMIT_PAUSE)
+            raise
+        return [{"href": r.get("href"), "title": r.get("title")} for r in raw if r.get("href")]
+
+    def save(self) -> None:
+        """Drop expired entries and flush to disk if anything changed."""
+        with self._lock:
+            cutoff = time.time() - self.ttl
+            expired = [key for key, entry in self._entries.items() if entry["fetched_at"] < cutoff]
+            for key in expired:
+                del self._entries[key]
+            if not (self._dirty or expired):
+                return
+            save_json_atomic(self.path, self._entries)
+            self._dirty = False
@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import datetime
+import itertools
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from agent_notion import AsyncNotionAgent, NOTION_TOKEN, NOTION_DATABASE_ID, print_info, print_success, print_error
+from http_transport import NOTION_ASYNC_CONCURRENCY
+from compression import default_method, open_text, SUFFIXES
+from state_store import state_path, load_json, save_json_atomic, remove_file
+
+load_dotenv()
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+CHECKPOINT_PATH = state_path("seed_restore_checkpoint.json")
+RESTORE_CHUNK = int(os.getenv("SEED_RESTORE_CHUNK", "100"))  # items per save_many call / checkpoint write
+
+SEED_FORMAT = "notion-seed"
+SEED_VERSION = 1
+SEED_FIELDS = ("title", "content", "tag", "url", "status")
+
+# -----------------------------------------------------------------------------
+# Seed Files (JSONL, optionally gzip/zstd compressed)
+# -----------------------------------------------------------------------------
+
+def seed_file_suffix(method: Optional[str] = None) -> str:
+    return ".jsonl" + SUFFIXES[method or default_method()]
+
+def write_seed_file(records: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Stream seed records to `path` (first line is a header). Records are
+    written as they come, so memory stays flat however large the database is.
+    Returns the number of records written.
+    """
+    count = 0
+    with open_text(path, "w") as f:
+        header = {
+            "format": SEED_FORMAT,
+            "version": SEED_VERSION,
+            "seed_id": uuid.uuid4().hex,
+            "generated_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        f.write(json.dumps({"_meta": header}, ensure_ascii=False) + "\n")
+        for record in records:
+            f.write(json.dumps({k: record.get(k) for k in SEED_FIELDS}, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def open_seed_file(path: str) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """Return (header, lazy record iterator) for a seed file."""
+    f = open_text(path, "r")
+    first = f.readline()
+    try:
+        header = json.loads(first).get("_meta") if first.strip() else None
+    except ValueError:
+        header = None
+    if not header or header.get("format") != SEED_FORMAT:
+        f.close()
+        raise ValueError(f"{path} is not a seed file")
+
+    def records() -> Iterator[Dict[str, Any]]:
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, records()
+
+# -----------------------------------------------------------------------------
+# Checkpoint
+# -----------------------------------------------------------------------------
+
+def seed_fingerprint(items: List[Dict[str, Any]]) -> str:
+    """Identify a seed by its titles so a checkpoint is never applied to another seed."""
+    h = hashlib.md5()
+    for item in items:
+        h.update((item.get("title") or "").encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def load_checkpoint(path: str, fingerprint: str) -> Optional[Set[int]]:
+    """Indexes of items already restored by an earlier, interrupted run (None: no such run)."""
+    data = load_json(path)
+    if not data or data.get("seed") != fingerprint or data.get("database_id") != NOTION_DATABASE_ID:
+        return None
+    return set(data.get("done", []))
+
+def save_checkpoint(path: str, fingerprint: str, done: Set[int]) -> None:
+    save_json_atomic(path, {
+        "seed": fingerprint,
+        "database_id": NOTION_DATABASE_ID,
+        "done": sorted(done),
+        "saved_at": time.time(),
+    })
+
+# -----------------------------------------------------------------------------
+# Restore
+# -----------------------------------------------------------------------------
+
+async def restore_items(
+    items: Iterable[Dict[str, Any]],
+    fingerprint: str,
+    fresh_target: bool = False,
+    checkpoint_path: str = CHECKPOINT_PATH,
+    concurrency: int = NOTION_ASYNC_CONCURRENCY,
+    chunk_size: int = RESTORE_CHUNK,
+    total: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Restore seed items with bounded concurrency, resuming from the checkpoint.
+
+    fresh_target: the database is known to be empty (apart from what earlier
+        runs of this restore wrote), so no existence lookups are made.
+    items are consumed lazily, one chunk at a time; `fingerprint` identifies
+    the seed so a checkpoint only resumes the restore it belongs to.
+    total: number of items, if known, for the progress ETA.
+    """
+    done = load_checkpoint(checkpoint_path, fingerprint)
+    resumed = done is not None
+    done = done or set()
+    if resumed:
+        print_info(f"从检查点恢复：跳过已完成的 {len(done)} 条")
+    # Written up front so a crash before the first chunk completes still resumes
+    save_checkpoint(checkpoint_path, fingerprint, done)
+    # The interrupted run may have written items up to one chunk past its last
+    # checkpoint without recording them (checkpoint and index are saved per chunk)
+    unsure_below = max(done, default=-1) + chunk_size + 1 if resumed else 0
+    pending = ((i, item) for i, item in enumerate(items) if i not in done)
+
+    totals = {"created": 0, "updated": 0, "skipped": 0, "error": 0}
+    started = time.monotonic()
+
+    async with AsyncNotionAgent(persist_index=True, concurrency=concurrency) as agent:
+        if fresh_target:
+            agent.assume_empty_target(resume=resumed)
+
+        processed = 0
+        while True:
+            chunk = list(itertools.islice(pending, chunk_size))
+            if not chunk:
+                break
+            unsure = [item.get("title") for i, item in chunk if i < unsure_below]
+            if unsure:
+                # Look these up in Notion rather than trust the (possibly stale) index
+                try:
+                    await agent.find_existing_many(unsure, refresh=True)
+                except Exception as e:
+                    # Left out of the checkpoint: retried by the next run
+                    print_error(f"续传查重失败: {e}")
+                    totals["error"] += len(chunk)
+                    continue
+            batch = await agent.save_many([item for _, item in chunk])
+            for (i, _), result in zip(chunk, batch.results):
+                totals[result] = totals.get(result, 0) + 1
+                if result != "error":
+                    done.add(i)
+            save_checkpoint(checkpoint_path, fingerprint, done)
+
+            processed += len(chunk)
+            elapsed = time.monotonic() - started
+            rate = processed / elapsed if elapsed > 0 else 0.0
+            eta = ""
+            if total is not None and rate > 0:
+                eta = f"，预计剩余 {max(total - len(done), 0) / rate:.0f}s"
+            print_info(f"进度：本次 {processed} 条，累计完成 {len(done)} 条，{rate:.1f} 条/s{eta}")
+
+    elapsed = time.monotonic() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    if not totals["error"]:
+        # Finished: a rerun should start over rather than skip everything
+        remove_file(checkpoint_path)
+    print_success(
+        f"恢复完成：新增 {totals['created']}，更新 {totals['updated']}，跳过 {totals['skipped']}，"
+        f"失败 {totals['error']}；耗时 {elapsed:.1f}s（{rate:.1f} 条/s）"
+    )
+    return totals
+
+def _restore_cli(items: Iterable[Dict[str, Any]], fingerprint: str, argv: Optional[List[str]],
+                 total: Optional[int] = None) -> None:
+    parser = argparse.ArgumentParser(description="Restore seed data into the Notion database")
+    parser.add_argument("--fresh-target", action="store_true",
+                        help="Target database is empty: skip existence lookups and create directly")
+    parser.add_argument("--concurrency", type=int, default=NOTION_ASYNC_CONCURRENCY,
+                        help="Maximum in-flight Notion requests")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH, help="Checkpoint file used to resume")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+    args = parser.parse_args(argv)
+
+    if not NOTION_TOKEN or not NOTION_DATABASE_ID:
+        print_error("环境变量 NOTION_TOKEN 或 NOTION_DATABASE_ID 未设置")
+        return
+    if args.restart:
+        remove_file(args.checkpoint)
+
+    asyncio.run(restore_items(
+        items,
+        fingerprint,
+        fresh_target=args.fresh_target,
+        checkpoint_path=args.checkpoint,
+        concurrency=args.concurrency,
+        total=total,
+    ))
+
+def restore_seed(items: List[Dict[str, Any]], argv: Optional[List[str]] = None) -> None:
+    """Restore an in-memory list of seed items (command-line flags from argv)."""
+    print(f"🌱 开始播种数据，共 {len(items)} 条...")
+    _restore_cli(items, seed_fingerprint(items), argv, total=len(items))
+
+def restore_seed_file(path: str, argv: Optional[List[str]] = None) -> None:
+    """Restore a seed file, streaming its records (used by data_seed_latest.py)."""
+    header, records = open_seed_file(path)
+    # A streaming pass just to count: cheap next to the Notion writes, and it gives the ETA
+    total = sum(1 for _ in open_seed_file(path)[1])
+    print(f"🌱 开始播种数据：{os.path.basename(path)}，共 {total} 条（生成于 {header.get('generated_at')}）")
+    _restore_cli(records, header["seed_id"], argv, total=total)
+
+def backup_seed_items(path: str) -> List[Dict[str, Any]]:
+    """Seed items from a JSON backup (skills_*.json, optionally .gz / .zst)."""
+    with open_text(path, "r") as f:
+        records = json.load(f)
+    return [
+        {
+            "title": r["Name"],
+            "content": r["Content"],
+            "tag": r["Type"],
+            "url": r["Source"],
+            "status": r["Status"],
+        }
+        for r in records
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Restore a backup into the Notion database")
+    parser.add_argument("backup", help="Seed file (data_seed_*.jsonl[.gz|.zst]) or JSON backup (skills_*.json[.gz|.zst])")
+    args, rest = parser.parse_known_args()
+
+    if ".jsonl" in os.path.basename(args.backup):
+        restore_seed_file(args.backup, rest)
+    else:
+        restore_seed(backup_seed_items(args.backup), rest)
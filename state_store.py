@@ -0,0 +1,116 @@
+import os
+import json
+import datetime
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writers race as before
+    fcntl = None
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Local state (indexes, caches, watermarks) lives here; mount it as a volume in Docker.
+STATE_DIR = os.getenv("AGENT_STATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "state"))
+
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+TMP_PREFIX = ".tmp_"  # in-progress atomic writes; anything left over is from a crash
+WATERMARK_OVERLAP = 300  # seconds re-read before a last_edited_time watermark to absorb clock skew
+
+def utc_now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+def iso(dt: datetime.datetime) -> str:
+    """Format a UTC datetime the way Notion timestamps look."""
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+def parse_iso(value: Optional[str]) -> Optional[datetime.datetime]:
+    """Parse an ISO timestamp (naive ones are taken as UTC); None if empty or invalid."""
+    if not value:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=datetime.timezone.utc)
+
+def state_path(name: str) -> str:
+    """Absolute path of a file inside the state directory."""
+    return os.path.join(STATE_DIR, name)
+
+def load_json(path: str, default: Any = None) -> Any:
+    """Load a JSON file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def save_json_atomic(path: str, data: Any) -> None:
+    """Write JSON via temp file + rename so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=TMP_PREFIX, dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """
+    Yield a temp path next to `path` (same suffix, so codecs picked by suffix
+    still work). It replaces `path` only if the block completes; on error the
+    partial file is removed and `path` is left untouched.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.basename(path)
+    suffix = name[name.find("."):] if "." in name else ""
+    fd, tmp_path = tempfile.mkstemp(prefix=TMP_PREFIX, suffix=suffix, dir=directory)
+    os.close(fd)
+    # mkstemp creates 0600; give the result normal file permissions
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        remove_file(tmp_path)
+        raise
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock on `path` + ".lock" across processes, e.g.
+    around a read-merge-write of a shared state file.
+    """
+    if fcntl is None:
+        yield
+        return
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    with open(path + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def remove_file(path: str) -> None:
+    """Delete a state file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
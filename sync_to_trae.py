@@ -1,90 +1,49 @@
 import os
-import requests
+import argparse
 from dotenv import load_dotenv
-from agent_notion import extract_plain_rich_text
+from notion_mirror import NotionMirror
 
 load_dotenv()
 
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
 
-def fetch_active_skills():
-    """Fetch all pages with Status='Active'."""
-    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "filter": {
-            "property": "Status",
-            "status": {
-                "equals": "Active"
-            }
-        }
-    }
-    
-    results = []
-    has_more = True
-    next_cursor = None
-    
-    while has_more:
-        if next_cursor:
-            payload["start_cursor"] = next_cursor
-        
-        try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=30)
-            if resp.status_code != 200:
-                print(f"Error fetching data: {resp.text}")
-                break
-                
-            data = resp.json()
-            results.extend(data.get("results", []))
-            has_more = data.get("has_more", False)
-            next_cursor = data.get("next_cursor")
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Network error: {e}")
-            break
-        
-    return results
+def fetch_active_skills(mirror: NotionMirror, fresh: bool = False):
+    """Stream all pages with Status='Active' from the local mirror (pages archived in Notion dropped first)."""
+    try:
+        mirror.ensure_fresh(force=fresh, full=fresh, check_deleted=True)
+    except Exception as e:
+        print(f"❌ Network error: {e}")
+    return mirror.iter_pages(status="Active")
 
-def format_for_trae(pages):
-    """Format pages into a single string for Trae."""
-    output_lines = []
-    
-    output_lines.append("# Trae Global Skills & Rules Export")
-    output_lines.append(f"# Generated from Notion Database: {len(pages)} items\n")
+def iter_trae_lines(pages, total):
+    """Yield the Trae export line by line."""
+    yield "# Trae Global Skills & Rules Export"
+    yield f"# Generated from Notion Database: {total} items\n"
     
     for page in pages:
-        props = page.get("properties", {})
-        
-        # Name
-        name_prop = props.get("Name", {})
-        title_list = name_prop.get("title", [])
-        title = title_list[0].get("text", {}).get("content", "Untitled") if title_list else "Untitled"
+        title = page.title or "Untitled"
+        content = page.content
         
-        # Content
-        content_prop = props.get("Content", {})
-        content = extract_plain_rich_text(content_prop)
-        
-        output_lines.append(f"## {title}")
-        output_lines.append(content)
-        output_lines.append("\n" + "-"*40 + "\n")
-        
-    return "\n".join(output_lines)
+        yield f"## {title}"
+        yield content
+        yield "\n" + "-"*40 + "\n"
 
 def main():
+    parser = argparse.ArgumentParser(description="Export Active skills for Trae")
+    parser.add_argument("--fresh", action="store_true", help="Full mirror rescan before exporting")
+    args = parser.parse_args()
+
     print("⏳ Fetching Active skills from Notion...")
-    pages = fetch_active_skills()
-    print(f"✅ Found {len(pages)} active skills.")
-    
-    formatted_text = format_for_trae(pages)
-    
-    print("\n" + "="*20 + " COPY BELOW THIS LINE " + "="*20 + "\n")
-    print(formatted_text)
-    print("\n" + "="*20 + " COPY ABOVE THIS LINE " + "="*20 + "\n")
+    with NotionMirror() as mirror:
+        pages = fetch_active_skills(mirror, fresh=args.fresh)
+        total = mirror.count(status="Active")
+        print(f"✅ Found {total} active skills.")
+        
+        print("\n" + "="*20 + " COPY BELOW THIS LINE " + "="*20 + "\n")
+        for line in iter_trae_lines(pages, total):
+            print(line)
+        print("\n" + "="*20 + " COPY ABOVE THIS LINE " + "="*20 + "\n")
 
 if __name__ == "__main__":
     main()
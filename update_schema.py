@@ -1,6 +1,6 @@
 import os
 import sys
-from notion_client import Client
+from http_transport import build_notion_client
 from dotenv import load_dotenv
 from colorama import init, Fore, Style
 
@@ -19,7 +19,7 @@ def update_schema():
         print_error("Missing Environment Variables")
         return
 
-    client = Client(auth=NOTION_TOKEN)
+    client = build_notion_client(NOTION_TOKEN)
 
     try:
         print_info(f"Checking schema for Database ID: {NOTION_DATABASE_ID}")
@@ -106,6 +106,20 @@ def update_schema():
              print_success("Created 'Content' property.")
         else:
              print_success("'Content' property exists.")
+
+        # 5. Ensure 'Content Hash' is rich_text (md5 of Content, written by NotionAgent)
+        hash_prop = props.get("Content Hash")
+        if not hash_prop:
+            print_info("'Content Hash' property missing. Creating as Rich Text...")
+            client.databases.update(
+                database_id=NOTION_DATABASE_ID,
+                properties={"Content Hash": {"rich_text": {}}}
+            )
+            print_success("Created 'Content Hash' property. Hide it in your views; existing pages are backfilled lazily.")
+        elif hash_prop.get("type") != "rich_text":
+            print_error(f"'Content Hash' property exists but is {hash_prop.get('type')} (expected rich_text). Manual check recommended.")
+        else:
+            print_success("'Content Hash' property exists.")
             
         print_success("Schema update/verification complete.")
 
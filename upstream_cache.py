@@ -0,0 +1,77 @@
+import time
+import threading
+from typing import Any, Dict, Optional
+
+from state_store import state_path, load_json, save_json_atomic
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+VALIDATOR_CACHE_PATH = state_path("upstream_validators.json")
+
+# -----------------------------------------------------------------------------
+# Conditional GET Validator Cache
+# -----------------------------------------------------------------------------
+
+class ValidatorCache:
+    """
+    Persistent per-URL HTTP validators (ETag / Last-Modified) plus the MD5 of the
+    Notion Content written from the body they describe. A 304 only proves the
+    Source is unchanged, so validators are used only for a page whose Content
+    still has that MD5 (see matches).
+    """
+    def __init__(self, path: str = VALIDATOR_CACHE_PATH):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = load_json(path, {}) or {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(url)
+            return dict(entry) if entry else None
+
+    def matches(self, url: str, content_hash: Optional[str]) -> bool:
+        """Whether `url` has validators synced into a page whose Content MD5 is `content_hash`."""
+        entry = self.get(url)
+        return bool(entry and content_hash and entry.get("hash") == content_hash)
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for `url` (empty when nothing is cached)."""
+        entry = self.get(url)
+        headers: Dict[str, str] = {}
+        if not entry:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str) -> None:
+        """Remember validators for a body now in Notion as Content with MD5 `content_hash`."""
+        if not etag and not last_modified:
+            self.forget(url)
+            return
+        with self._lock:
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "hash": content_hash,
+                "stored_at": time.time(),
+            }
+            self._dirty = True
+
+    def forget(self, url: str) -> None:
+        with self._lock:
+            if self._entries.pop(url, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """Flush to disk if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            save_json_atomic(self.path, self._entries)
+            self._dirty = False
@@ -0,0 +1,75 @@
+import re
+from typing import List, Optional, Sequence
+from urllib.parse import urlsplit
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+PERMANENT_REDIRECTS = (301, 308)
+GITHUB_RAW_HOST = "raw.githubusercontent.com"
+DEFAULT_BRANCHES = ("main", "master")
+
+# github.com/<owner>/<repo>/blob/<ref>/<path>
+GITHUB_BLOB = re.compile(r"^https?://(?:www\.)?github\.com/([^/]+)/([^/]+)/blob/(.+)$", re.IGNORECASE)
+# raw.githubusercontent.com/<owner>/<repo>/<branch>/<path>
+GITHUB_RAW = re.compile(r"^https://raw\.githubusercontent\.com/([^/]+)/([^/]+)/([^/]+)/(.+)$", re.IGNORECASE)
+
+# -----------------------------------------------------------------------------
+# Redirects
+# -----------------------------------------------------------------------------
+
+def redirect_chain(resp) -> List[str]:
+    """URLs visited by a requests response, first request to final location."""
+    return [r.url for r in resp.history] + [resp.url] if resp.history else []
+
+def canonical_url(resp) -> Optional[str]:
+    """
+    Final URL of a response reached only through permanent redirects
+    (e.g. a renamed GitHub repo). Temporary redirects are not canonical.
+    """
+    if not resp.history or any(r.status_code not in PERMANENT_REDIRECTS for r in resp.history):
+        return None
+    return resp.url
+
+# -----------------------------------------------------------------------------
+# Deterministic Repairs
+# -----------------------------------------------------------------------------
+
+def _strip_query(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+def github_raw_url(url: str) -> Optional[str]:
+    """github.com blob page -> raw.githubusercontent.com content URL."""
+    match = GITHUB_BLOB.match(_strip_query(url))
+    if not match:
+        return None
+    owner, repo, ref_path = match.groups()
+    return f"https://{GITHUB_RAW_HOST}/{owner}/{repo}/{ref_path}"
+
+def branch_swapped(url: str) -> Optional[str]:
+    """Raw GitHub URL on the other default branch (main <-> master)."""
+    match = GITHUB_RAW.match(url)
+    if not match or match.group(3) not in DEFAULT_BRANCHES:
+        return None
+    owner, repo, branch, path = match.groups()
+    other = DEFAULT_BRANCHES[1 - DEFAULT_BRANCHES.index(branch)]
+    return f"https://{GITHUB_RAW_HOST}/{owner}/{repo}/{other}/{path}"
+
+def repair_candidates(url: str, redirects: Sequence[str] = ()) -> List[str]:
+    """
+    Cheap replacements for a failed Source, most likely first: the raw
+    content endpoint of the redirect target and of the URL itself, then the
+    same on the other default branch. No search engine involved.
+    """
+    bases = [redirects[-1]] if redirects and redirects[-1] != url else []
+    bases.append(url)
+
+    candidates: List[str] = []
+    for base in bases:
+        raw = github_raw_url(base) or (base if GITHUB_RAW.match(base) else None)
+        for candidate in (raw, branch_swapped(raw) if raw else None):
+            if candidate and candidate != url and candidate not in candidates:
+                candidates.append(candidate)
+    return candidates